@@ -0,0 +1,51 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Startup-time benchmark for each entry point.
+# Every case runs in a fresh interpreter so import costs are measured cold.
+# Usage: python bench_startup.py [repeats]
+
+HEAVY_MODULES = ['ccxt', 'ta', 'requests', 'smtplib']
+
+REPORT = "import sys; print('loaded=' + ','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+
+CASES = {
+    'python (baseline)': "pass",
+    'import ccxt (reference)': "import ccxt",
+    'main.py --help': "import sys; sys.argv = ['main.py', '--help']\nimport main\ntry:\n    main.main()\nexcept SystemExit:\n    pass",
+    # Full startup through the first scan; the rate-limit sleep raises KeyboardInterrupt,
+    # which main() handles as a normal stop
+    'main.py --offline (1st scan)': "import sys, time\nsys.argv = ['main.py', '--offline']\ndef stop(_):\n    raise KeyboardInterrupt\ntime.sleep = stop\nimport main\nmain.main()",
+    'optimize.py': "import optimize",
+    'test_run.py': "import test_run",
+    'test_enhanced.py': "import test_enhanced",
+    'test_scalping.py': "import test_scalping",
+}
+
+def time_case(code, repeats):
+    root = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    loaded = ''
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', code + "\n" + REPORT],
+                             cwd=root, capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - start)
+        loaded = out.stdout.rsplit('loaded=', 1)[-1].strip()
+    return statistics.median(timings), loaded
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Startup benchmark (median of {repeats} cold runs)")
+    print("-" * 66)
+    print(f"{'Entry point':<30}{'Time (ms)':>12}   Heavy modules loaded")
+    for name, code in CASES.items():
+        median, loaded = time_case(code, repeats)
+        print(f"{name:<30}{median * 1000:>12.1f}   {loaded or '-'}")
+    print("-" * 66)
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,6 @@ import time
 import os
 import argparse
 from dotenv import load_dotenv
-from src.data_loader import ExchangeClient
-from src.strategy import RSIStrategy, MACDStrategy, BollingerRSIStrategy, EnhancedTrendRSIStrategy
-from src.notifier import Notifier
 
 # Load environment variables
 load_dotenv()
@@ -13,7 +10,13 @@ def main():
     parser = argparse.ArgumentParser(description='Bitcoin Trading Bot')
     parser.add_argument('--symbol', type=str, default='BTC/USDT', help='Trading Pair')
     parser.add_argument('--timeframe', type=str, default='1h', help='Candle Timeframe')
-    parser.add_argument('--strategy', type=str, default='RSI', choices=['RSI', 'MACD', 'BOLLINGER_RSI', 'ENHANCED_RSI'], help='Strategy to use')
+    parser.add_argument('--strategy', type=str, default='RSI', choices=['RSI', 'MACD', 'BOLLINGER_RSI', 'ENHANCED_RSI', 'RULES'], help='Strategy to use')
+    parser.add_argument('--buy-rule', type=str, default=None, help='RULES strategy buy expression, e.g. "rsi(14) < 30 & close > ema(200)"')
+    parser.add_argument('--sell-rule', type=str, default=None, help='RULES strategy sell expression, e.g. "rsi(14) > 70"')
+    parser.add_argument('--base-timeframe', type=str, default=None, help='Build --timeframe candles by resampling this finer timeframe (e.g. 1m)')
+    parser.add_argument('--checkpoint', type=str, default=None, help='Snapshot file for streaming indicator state; a restart resumes from it')
+    parser.add_argument('--warmup', type=int, default=1000, help='Candles used to warm up indicators when there is no usable checkpoint')
+    parser.add_argument('--offline', action='store_true', help='Read candles from the local DB only (no exchange API)')
     # parser.add_argument('--live', action='store_true', help='Enable Live Trading (Real Money)')
     # parser.add_argument('--amount', type=float, default=0.0001, help='Amount to trade in base currency')
     # parser.add_argument('--stop-loss', type=float, default=0.02, help='Stop Loss percentage (e.g. 0.02 for 2%)')
@@ -21,8 +24,13 @@ def main():
     
     args = parser.parse_args()
     
+    # Imported after argument parsing so --help and bad arguments return instantly
+    from src.data_loader import ExchangeClient
+    from src.strategy import RSIStrategy, MACDStrategy, BollingerRSIStrategy, EnhancedTrendRSIStrategy, RuleStrategy
+    from src.notifier import Notifier
+    
     # Initialize components
-    exchange_client = ExchangeClient()
+    exchange_client = ExchangeClient(offline=args.offline)
     notifier = Notifier()
     
     if args.strategy == 'RSI':
@@ -33,22 +41,52 @@ def main():
         strategy = BollingerRSIStrategy()
     elif args.strategy == 'ENHANCED_RSI':
         strategy = EnhancedTrendRSIStrategy()
+    elif args.strategy == 'RULES':
+        if not args.buy_rule or not args.sell_rule:
+            parser.error("--strategy RULES requires --buy-rule and --sell-rule")
+        try:
+            strategy = RuleStrategy("Rule Strategy", buy=args.buy_rule, sell=args.sell_rule)
+        except ValueError as e:
+            parser.error(str(e))
     else:
         raise ValueError("Unknown strategy")
         
+    checkpointer = None
+    if args.checkpoint:
+        from src.checkpoint import Checkpointer
+        # Checkpoints need incremental indicator state; the rule form gives identical signals
+        if not isinstance(strategy, RuleStrategy):
+            strategy = strategy.to_rules()
+        checkpointer = Checkpointer(args.checkpoint, strategy, args.symbol, args.timeframe)
+        if checkpointer.restore():
+            notifier.notify(f"Restored checkpoint state up to {checkpointer.last_timestamp}")
+        
     notifier.notify(f"Starting {strategy.name} Indicator Scanner for {args.symbol} ({args.timeframe})")
     
     while True:
         try:
             # Fetch data
-            df = exchange_client.fetch_ohlcv(args.symbol, args.timeframe)
+            limit = checkpointer.fetch_limit(args.warmup) if checkpointer else 100
+            if args.base_timeframe:
+                df = exchange_client.fetch_ohlcv_resampled(args.symbol, args.timeframe, limit=limit, base_timeframe=args.base_timeframe)
+            else:
+                df = exchange_client.fetch_ohlcv(args.symbol, args.timeframe, limit=limit)
             
             if not df.empty:
-                # Analyze full dataframe to get indicators
-                df_analyzed = strategy.analyze(df)
-                
-                # Get last row
-                curr = df_analyzed.iloc[-1]
+                if checkpointer:
+                    # Fold newly closed candles into the state, snapshot, then peek at the forming candle
+                    if checkpointer.catch_up(df.iloc[:-1]) is None:
+                        continue # stale snapshot, refetch a full warm-up right away
+                    checkpointer.save()
+                    forming = df.iloc[-1]
+                    signal = strategy.peek(forming)
+                    curr = {**strategy.last_values, 'close': forming['close'], 'signal': signal}
+                else:
+                    # Analyze full dataframe to get indicators
+                    df_analyzed = strategy.analyze(df)
+                    
+                    # Get last row
+                    curr = df_analyzed.iloc[-1]
                 
                 # Extract key metrics based on strategy
                 price = curr['close']
@@ -78,6 +116,8 @@ def main():
             time.sleep(10)
             
         except KeyboardInterrupt:
+            if checkpointer:
+                checkpointer.save()
             notifier.notify("Stopping Trading Bot...")
             break
         except Exception as e:
@@ -1,12 +1,22 @@
 
+import argparse
 import itertools
+import numpy as np
 import pandas as pd
 from src.data_loader import ExchangeClient
 from src.strategy import RSIStrategy, EnhancedTrendRSIStrategy
 from src.backtester import Backtester
+from src.robustness import RobustnessAnalyzer
+from src.metrics import compute_metrics, pad_trade_returns, trade_returns
 
-def optimize_rsi():
-    client = ExchangeClient()
+def rank_results(results_df, rank_by):
+    # A config without a losing trade has an infinite profit factor; one lucky
+    # trade must not make it the winner, so infinite scores rank like NaN
+    score = results_df[rank_by].replace([np.inf, -np.inf], np.nan)
+    return results_df.loc[score.sort_values(ascending=False, na_position='last').index]
+
+def optimize_rsi(offline=False, resamples=10000, rank_by='return'):
+    client = ExchangeClient(offline=offline)
     # Fetch data once (large history)
     print("Fetching data for optimization...")
     # Fetching 10000 candles for optimization speed (use database cache if available)
@@ -21,53 +31,55 @@ def optimize_rsi():
     buy_thresholds = [20, 25, 30, 35]
     sell_thresholds = [65, 70, 75, 80]
     
-    best_return = -9999
-    best_params = None
-    
     print(f"Starting optimization across {len(periods)*len(buy_thresholds)*len(sell_thresholds)} combinations...")
     
-    results = []
+    params = []
+    curves = []
+    exposures = []
+    per_trade = []
 
     for period, buy, sell in itertools.product(periods, buy_thresholds, sell_thresholds):
         if buy >= sell:
              continue
              
         strategy = RSIStrategy(period=period, buy_threshold=buy, sell_threshold=sell)
-        backtester = Backtester(strategy, initial_capital=100, fee_rate=0.001)
-        
-        # Suppress prints by capturing stdout? Or just let it print?
-        # Backtest prints a lot. We might want to silence it or modify backtester to be silent.
-        # For now, let it run but maybe we only care about return.
-        # To be cleaner, we access backtester internals or trust it returns the equity curve.
-        # But we need the FINAL return.
-        
-        # HACK: Using a modified run that returns metrics would be better. 
-        # But we can calculate from equity curve returned.
+        backtester = Backtester(strategy, initial_capital=100, fee_rate=0.001, timeframe='1h')
+        backtester.run(df)
         
-        equity_curve = backtester.run(df)
-        final_val = equity_curve.iloc[-1]['equity'] if not equity_curve.empty else 100
-        total_return = (final_val - 100) / 100 * 100
-        
-        results.append({
-            'period': period,
-            'buy': buy,
-            'sell': sell,
-            'return': total_return
-        })
-        
-        if total_return > best_return:
-            best_return = total_return
-            best_params = (period, buy, sell)
-            print(f"New Best: {total_return:.2f}% Params: {best_params}")
+        params.append({'period': period, 'buy': buy, 'sell': sell})
+        curves.append(backtester.equity_curve['equity'].to_numpy())
+        exposures.append(backtester.in_position)
+        per_trade.append(trade_returns(backtester.exit_equity, 100))
+
+    # Score every configuration in one batched pass over the stacked equity curves
+    metrics = compute_metrics(np.vstack(curves), backtester.periods_per_year, initial=100,
+                              exposure=np.vstack(exposures), trade_returns=pad_trade_returns(per_trade))
+    results_df = pd.DataFrame(params).assign(**metrics).rename(columns={'total_return': 'return'})
+    ranked = rank_results(results_df, rank_by)
+    best = ranked.iloc[0]
+    best_params = (int(best['period']), int(best['buy']), int(best['sell']))
 
     print("\noptimization Complete.")
-    print(f"Best Return: {best_return:.2f}%")
+    print(ranked.head(5)[['period', 'buy', 'sell', 'return', 'sharpe', 'sortino', 'calmar', 'max_drawdown', 'trades']].to_string(index=False))
+    print(f"Best by {rank_by}: {best[rank_by]:.2f} (Return {best['return']:.2f}%)")
     print(f"Best Parameters: RSI Period={best_params[0]}, Buy={best_params[1]}, Sell={best_params[2]}")
     
     # Save results
-    results_df = pd.DataFrame(results)
     results_df.to_csv('optimization_results.csv', index=False)
     print("Results saved to optimization_results.csv")
 
+    # A single backtest path is not enough to trust the winner: check how its
+    # return, drawdown and Sharpe hold up under resampling.
+    if resamples:
+        strategy = RSIStrategy(period=best_params[0], buy_threshold=best_params[1], sell_threshold=best_params[2])
+        backtester = Backtester(strategy, initial_capital=100, fee_rate=0.001, timeframe='1h')
+        backtester.run(df)
+        RobustnessAnalyzer(n_samples=resamples).run(backtester)
+
 if __name__ == "__main__":
-    optimize_rsi()
+    parser = argparse.ArgumentParser(description='RSI Parameter Optimizer')
+    parser.add_argument('--offline', action='store_true', help='Use cached DB candles only (no exchange API)')
+    parser.add_argument('--resamples', type=int, default=10000, help='Monte Carlo resamples for the best parameters (0 to skip)')
+    parser.add_argument('--rank-by', type=str, default='return', choices=['return', 'sharpe', 'sortino', 'calmar', 'profit_factor'], help='Metric used to pick the best parameters')
+    args = parser.parse_args()
+    optimize_rsi(offline=args.offline, resamples=args.resamples, rank_by=args.rank_by)
@@ -2,14 +2,136 @@ import pandas as pd
 import numpy as np
 import time
 from .strategy import BaseStrategy
+from .metrics import compute_metrics, periods_per_year, trade_returns
 
 class Backtester:
-    def __init__(self, strategy: BaseStrategy, initial_capital=10000.0, fee_rate=0.001):
+    def __init__(self, strategy: BaseStrategy, initial_capital=10000.0, fee_rate=0.001,
+                 stop_loss=None, take_profit=None, slippage=0.0, position_size=1.0, timeframe=None):
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.fee_rate = fee_rate
+        # Execution model
+        # stop_loss / take_profit: fractions of the entry fill (e.g. 0.02 = 2%), checked intrabar on low/high
+        # slippage: fraction applied against us on every fill
+        # position_size: fraction of equity committed per trade, the rest stays in cash
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.slippage = slippage
+        self.position_size = position_size
+        # Candle timeframe for annualizing metrics; inferred from timestamps if None
+        self.timeframe = timeframe
+        self.periods_per_year = 1.0
         self.equity_curve = []
+        self.in_position = None
         self.trades = []
+        self.exit_equity = np.array([]) # equity after each closed trade
+        self.metrics = {}
+
+    def _first_exit(self, highs, lows, opens, entry, signal_exit, stop_price, tp_price):
+        """
+        Find where a trade opened at `entry` ends: the first bar after entry whose
+        range touches the stop/take-profit, else the `signal_exit` bar.
+        Returns (bar, raw exit price or None for a close fill, reason).
+        A bar touching both levels is assumed to hit the stop first unless it opened
+        beyond the take-profit.
+        """
+        end = signal_exit + 1 if signal_exit is not None else len(lows)
+        j = None
+        if stop_price is not None or tp_price is not None:
+            # Scan in windows that double in size, so a trade only pays for the
+            # bars it was actually open (amortized), not all bars up to `end`
+            start, size = entry + 1, 64
+            while start < end:
+                until = min(start + size, end)
+                hit = np.zeros(until - start, dtype=bool)
+                if stop_price is not None:
+                    hit |= lows[start:until] <= stop_price
+                if tp_price is not None:
+                    hit |= highs[start:until] >= tp_price
+                if hit.any():
+                    j = start + int(np.argmax(hit))
+                    break
+                start, size = until, size * 2
+
+        if j is not None:
+            if stop_price is not None and opens[j] <= stop_price:
+                return j, opens[j], 'stop_loss'
+            if tp_price is not None and opens[j] >= tp_price:
+                return j, opens[j], 'take_profit'
+            if stop_price is not None and lows[j] <= stop_price:
+                return j, stop_price, 'stop_loss'
+            return j, tp_price, 'take_profit'
+
+        if signal_exit is None:
+            return None, None, None
+        return signal_exit, None, 'signal'
+
+    def _simulate(self, df):
+        """
+        Array-form trade simulation. Python only steps from trade to trade;
+        finding entries, exits and filling the equity curve is done with NumPy
+        searches and slice assignments over the bars each trade spans, so cost
+        stays O(n) in candles however many trades there are.
+        """
+        closes = df['close'].to_numpy(dtype=float)
+        opens = df['open'].to_numpy(dtype=float)
+        highs = df['high'].to_numpy(dtype=float)
+        lows = df['low'].to_numpy(dtype=float)
+        times = df['timestamp'].to_numpy()
+        buy_idx = np.flatnonzero((df['signal'] == 'buy').to_numpy())
+        sell_idx = np.flatnonzero((df['signal'] == 'sell').to_numpy())
+
+        n = len(closes)
+        cash = np.empty(n)
+        units = np.zeros(n)
+        capital = self.initial_capital
+        trades = []
+        exits = []
+        start = 0
+
+        while start < n:
+            k = np.searchsorted(buy_idx, start)
+            if k == len(buy_idx):
+                break
+            entry = buy_idx[k]
+            cash[start:entry] = capital
+
+            # Buy
+            entry_fill = closes[entry] * (1 + self.slippage)
+            invested = capital * self.position_size
+            cost = invested * (1 - self.fee_rate)
+            qty = cost / entry_fill
+            cash_left = capital - invested
+            trades.append({'type': 'buy', 'price': entry_fill, 'time': pd.Timestamp(times[entry]), 'equity': cost})
+
+            stop_price = entry_fill * (1 - self.stop_loss) if self.stop_loss else None
+            tp_price = entry_fill * (1 + self.take_profit) if self.take_profit else None
+            s = np.searchsorted(sell_idx, entry, side='right')
+            signal_exit = sell_idx[s] if s < len(sell_idx) else None
+
+            exit_bar, raw_price, reason = self._first_exit(highs, lows, opens, entry, signal_exit, stop_price, tp_price)
+            if exit_bar is None:
+                # Still holding at the end of the data
+                cash[entry:] = cash_left
+                units[entry:] = qty
+                start = n
+                break
+
+            # Sell
+            exit_fill = (closes[exit_bar] if raw_price is None else raw_price) * (1 - self.slippage)
+            cash[entry:exit_bar] = cash_left
+            units[entry:exit_bar] = qty
+            capital = cash_left + qty * exit_fill * (1 - self.fee_rate)
+            cash[exit_bar] = capital
+            exits.append(capital)
+            trades.append({'type': 'sell', 'price': exit_fill, 'time': pd.Timestamp(times[exit_bar]), 'equity': capital,
+                           'pnl': (exit_fill - entry_fill) / entry_fill, 'reason': reason})
+            start = exit_bar + 1
+
+        cash[start:] = capital
+        # Mark to market equity
+        equity = cash + units * closes
+        return equity, units > 0, trades, np.array(exits)
 
     def run(self, df):
         """
@@ -20,83 +142,37 @@ class Backtester:
             print("Empty dataframe provided to backtester.")
             return
 
-        capital = self.initial_capital
-        position = 0 # 0: flat, >0: long (amount of asset)
-        entry_price = 0
-        
         print(f"Starting backtest for {self.strategy.name}...")
-        
+
         # 1. Analyze the whole dataframe once (Vectorized)
         df_analyzed = self.strategy.analyze(df)
-        
-        # 2. Iterate row by row ONLY for trade logic (much faster now)
-        # We can iterate tuples which is faster than iterrows
-        for row in df_analyzed.itertuples():
-            # row.signal, row.close, row.timestamp
-            
-            # Skip if signal is nan
-            if not isinstance(row.signal, str):
-                # Update equity curve for this timestamp
-                current_value = capital if position == 0 else (position * row.close)
-                self.equity_curve.append({'time': row.timestamp, 'equity': current_value})
-                continue
-            
-            if row.signal == 'buy' and position == 0:
-                 # Buy
-                 cost = capital * (1 - self.fee_rate)
-                 position = cost / row.close
-                 capital = 0
-                 entry_price = row.close
-                 self.trades.append({'type': 'buy', 'price': row.close, 'time': row.timestamp, 'equity': cost})
-                 
-            elif row.signal == 'sell' and position > 0:
-                 # Sell
-                 revenue = position * row.close * (1 - self.fee_rate)
-                 capital = revenue
-                 position = 0
-                 self.trades.append({'type': 'sell', 'price': row.close, 'time': row.timestamp, 'equity': capital, 'pnl': (row.close - entry_price)/entry_price})
-            
-            # Mark to market equity
-            current_value = capital if position == 0 else (position * row.close)
-            self.equity_curve.append({'time': row.timestamp, 'equity': current_value})
-
-        final_equity = self.equity_curve[-1]['equity'] if self.equity_curve else self.initial_capital
-        total_return = (final_equity - self.initial_capital) / self.initial_capital * 100
-        
-        # --- Enhanced Metrics ---
-        # 1. Win Rate
-        winning_trades = [t for t in self.trades if t.get('pnl', 0) > 0]
-        win_rate = (len(winning_trades) / len(self.trades) * 100) if self.trades else 0.0
-        
-        # 2. Max Drawdown
-        equity_series = pd.Series([d['equity'] for d in self.equity_curve])
-        if not equity_series.empty:
-            running_max = equity_series.cummax()
-            drawdown = (equity_series - running_max) / running_max
-            max_drawdown = drawdown.min() * 100
-        else:
-            max_drawdown = 0.0
-
-        # 3. Sharpe Ratio
-        # Calculate returns on the equity curve
-        returns = equity_series.pct_change().dropna()
-        if len(returns) > 1 and returns.std() != 0:
-            # Simple Sharpe (Mean / Std)
-            sharpe_ratio = returns.mean() / returns.std()
-        else:
-            sharpe_ratio = 0.0  
-            
+
+        # 2. Simulate fills in array form (no per-row loop)
+        equity, self.in_position, self.trades, self.exit_equity = self._simulate(df_analyzed)
+        self.equity_curve = pd.DataFrame({'time': df_analyzed['timestamp'].to_numpy(), 'equity': equity})
+
+        # 3. Metrics (annualized for the candle timeframe)
+        self.periods_per_year = periods_per_year(self.timeframe, df_analyzed['timestamp'])
+        self.metrics = compute_metrics(equity, self.periods_per_year, initial=self.initial_capital,
+                                       exposure=self.in_position,
+                                       trade_returns=trade_returns(self.exit_equity, self.initial_capital))
+        m = self.metrics
+
         print("-" * 30)
         print(f"Backtest Complete: {self.strategy.name}")
-        print(f"Final Equity: ${final_equity:.2f}")
-        print(f"Total Return: {total_return:.2f}%")
-        print(f"Trades: {len(self.trades)}")
-        print(f"Win Rate: {win_rate:.2f}%")
-        print(f"Max Drawdown: {max_drawdown:.2f}%")
-        print(f"Sharpe Ratio: {sharpe_ratio:.2f}")
+        print(f"Final Equity: ${equity[-1]:.2f}")
+        print(f"Total Return: {m['total_return']:.2f}% (CAGR {m['cagr']:.2f}%)")
+        print(f"Trades: {m['trades']}")
+        print(f"Win Rate: {m['win_rate']:.2f}%")
+        print(f"Profit Factor: {m['profit_factor']:.2f}")
+        print(f"Exposure: {m['exposure']:.2f}%")
+        print(f"Max Drawdown: {m['max_drawdown']:.2f}% (longest {m['max_dd_duration']} bars)")
+        print(f"Sharpe Ratio: {m['sharpe']:.2f} (annualized)")
+        print(f"Sortino Ratio: {m['sortino']:.2f}")
+        print(f"Calmar Ratio: {m['calmar']:.2f}")
         print("-" * 30)
-        
-        return pd.DataFrame(self.equity_curve)
+
+        return self.equity_curve
 
     def print_performance(self):
         pass # Already printed in run
@@ -0,0 +1,158 @@
+import json
+import os
+import struct
+import time
+import numpy as np
+import pandas as pd
+from .resampler import timeframe_to_ms
+
+# Snapshot of a RuleStrategy's streaming indicator state, so a restarted
+# scanner resumes instead of re-warming indicators (e.g. EMA-200) from scratch.
+#
+# File layout (little endian):
+#   magic (6s) | version (H) | header length (I) | JSON header | float64 state
+# The header says what the state belongs to (symbol, timeframe, graph
+# signature) and which closed candle it was last advanced with.
+
+MAGIC = b'TBCKPT'
+VERSION = 1
+_PREFIX = struct.Struct('<6sHI')
+
+def write_snapshot(path, header, state):
+    header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(np.asarray(state, dtype='<f8').tobytes())
+    # Atomic swap, so a crash mid-write never leaves a truncated snapshot
+    os.replace(tmp_path, path)
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _PREFIX.size:
+        raise ValueError("file is truncated")
+    magic, version, header_len = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a checkpoint file")
+    if version != VERSION:
+        raise ValueError(f"unsupported checkpoint version {version}")
+    body = data[_PREFIX.size:]
+    header = json.loads(body[:header_len].decode('utf-8'))
+    if not isinstance(header, dict):
+        raise ValueError("header is not a JSON object")
+    payload = body[header_len:]
+    if len(payload) % 8 or len(payload) // 8 != header.get('state_len'):
+        raise ValueError("state is truncated")
+    state = np.frombuffer(payload, dtype='<f8')
+    return header, state
+
+class Checkpointer:
+    """
+    Saves and restores a RuleStrategy's streaming state for one symbol/timeframe.
+    Only closed candles are folded into the state; callers peek() at the
+    forming candle separately.
+    """
+    def __init__(self, path, strategy, symbol, timeframe):
+        self.path = path
+        self.strategy = strategy
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.last_timestamp = None # last closed candle in the state
+        self.last_close = None
+        self._saved_timestamp = None
+
+    def restore(self):
+        """Load the snapshot if it matches this strategy/symbol/timeframe. Returns True on success."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            header, state = read_snapshot(self.path)
+            if header['symbol'] != self.symbol or header['timeframe'] != self.timeframe:
+                raise ValueError(f"it is for {header['symbol']} {header['timeframe']}")
+            if header['signature'] != self.strategy.stream.signature():
+                raise ValueError("strategy rules or parameters changed")
+            last_timestamp = pd.to_datetime(int(header['last_timestamp']), unit='ms')
+            last_close = float(header['last_close'])
+            self.strategy.reset()
+            self.strategy.stream.set_state(state)
+        except (ValueError, KeyError, TypeError) as e:
+            # Any incompatible snapshot means a cold start, never a crash
+            reason = f"header has no field {e}" if isinstance(e, KeyError) else e
+            print(f"Ignoring checkpoint {self.path}: {reason}")
+            self.strategy.reset()
+            return False
+
+        self.last_timestamp = last_timestamp
+        self.last_close = last_close
+        self._saved_timestamp = self.last_timestamp
+        return True
+
+    def fetch_limit(self, warmup):
+        # Candles to request: enough to cover what was missed since the snapshot
+        # (plus the forming candle), or a full warm-up when there is no state.
+        if self.last_timestamp is None:
+            return warmup
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        missed = (now - self.last_timestamp) // pd.Timedelta(milliseconds=timeframe_to_ms(self.timeframe))
+        return int(min(max(missed, 0) + 3, warmup))
+
+    def _stale_reason(self, closed):
+        timestamps = closed['timestamp']
+        if self.last_timestamp < timestamps.iloc[0]:
+            return "candles between the snapshot and the fetched data are missing"
+        if self.last_timestamp > timestamps.iloc[-1]:
+            return "snapshot is newer than the available data"
+        match = closed[timestamps == self.last_timestamp]
+        if match.empty:
+            return "last snapshot candle is not in the data"
+        if not np.isclose(match['close'].iloc[0], self.last_close):
+            return "last snapshot candle differs from the stored data"
+        return None
+
+    def catch_up(self, closed):
+        """
+        Feed the closed candles the state hasn't seen yet. Returns the number of
+        candles processed, or None if the snapshot can't be continued from this
+        data: the state is then reset and the caller must refetch a full
+        warm-up (fetch_limit() asks for it) and call catch_up() again.
+        """
+        if closed.empty:
+            return 0
+        if self.last_timestamp is not None:
+            reason = self._stale_reason(closed)
+            if reason:
+                # `closed` only covers the candles missed since the snapshot,
+                # far too few to re-warm long indicators from
+                print(f"Discarding stale checkpoint state: {reason}")
+                self.strategy.reset()
+                self.last_timestamp = None
+                self.last_close = None
+                return None
+            closed = closed[closed['timestamp'] > self.last_timestamp]
+
+        for row in closed.itertuples():
+            self.strategy.update(row)
+        if not closed.empty:
+            self.last_timestamp = closed['timestamp'].iloc[-1]
+            self.last_close = float(closed['close'].iloc[-1])
+        return len(closed)
+
+    def save(self):
+        """Write a snapshot if the state advanced since the last save."""
+        if self.last_timestamp is None or self.last_timestamp == self._saved_timestamp:
+            return False
+        state = self.strategy.stream.get_state()
+        write_snapshot(self.path, {
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'strategy': self.strategy.name,
+            'signature': self.strategy.stream.signature(),
+            'last_timestamp': int(self.last_timestamp.timestamp() * 1000),
+            'last_close': self.last_close,
+            'state_len': len(state),
+            'saved_at': time.time(),
+        }, state)
+        self._saved_timestamp = self.last_timestamp
+        return True
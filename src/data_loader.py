@@ -1,27 +1,49 @@
-import ccxt
 import pandas as pd
 import time
 import sqlite3
 import os
+from contextlib import closing
 from datetime import datetime
+from .resampler import TimeframeAggregator, timeframe_to_ms
 
 class ExchangeClient:
-    def __init__(self, exchange_id='binance'):
-        self.exchange_class = getattr(ccxt, exchange_id)
-        
-        # User requested to disable API usage for now. 
-        # Using public instance only. Explicitly disable keys.
-        self.exchange = self.exchange_class({
-            'apiKey': '', 
-            'secret': '',
-            'enableRateLimit': True
-        })
+    def __init__(self, exchange_id='binance', offline=False, db_path='trading_data.db'):
+        # offline=True serves candles from the local DB only: ccxt is never
+        # imported and the DB is opened read-only (no schema is created).
+        self.exchange_id = exchange_id
+        self.offline = offline
+        self._exchange = None
+        self._aggregators = {} # (symbol, base_timeframe) -> TimeframeAggregator
             
-        self.db_path = 'trading_data.db'
-        self._init_db()
+        self.db_path = db_path
+        if not self.offline:
+            self._init_db()
+
+    @property
+    def exchange(self):
+        # Build the ccxt exchange on first use; importing ccxt alone costs seconds.
+        if self.offline:
+            raise RuntimeError("ExchangeClient is offline: exchange API is not available.")
+        if self._exchange is None:
+            import ccxt
+            exchange_class = getattr(ccxt, self.exchange_id)
+
+            # User requested to disable API usage for now. 
+            # Using public instance only. Explicitly disable keys.
+            self._exchange = exchange_class({
+                'apiKey': '', 
+                'secret': '',
+                'enableRateLimit': True
+            })
+        return self._exchange
+
+    def _connect(self):
+        if self.offline:
+            return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return sqlite3.connect(self.db_path)
         
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS ohlcv (
@@ -42,7 +64,7 @@ class ExchangeClient:
     def _save_to_db(self, df, symbol, timeframe):
         if df.empty:
             return
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         data = []
         for row in df.itertuples():
             ts = int(row.timestamp.timestamp() * 1000)
@@ -57,21 +79,25 @@ class ExchangeClient:
         conn.close()
         
     def _load_from_db(self, symbol, timeframe, limit):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM ohlcv WHERE symbol=? AND timeframe=?", (symbol, timeframe))
-        count = cursor.fetchone()[0]
-        
-        query = f'''
-            SELECT timestamp, open, high, low, close, volume 
-            FROM ohlcv 
-            WHERE symbol=? AND timeframe=? 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        '''
-        cursor.execute(query, (symbol, timeframe, limit))
-        rows = cursor.fetchall()
-        conn.close()
+        try:
+            with closing(self._connect()) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM ohlcv WHERE symbol=? AND timeframe=?", (symbol, timeframe))
+                count = cursor.fetchone()[0]
+                
+                query = f'''
+                    SELECT timestamp, open, high, low, close, volume 
+                    FROM ohlcv 
+                    WHERE symbol=? AND timeframe=? 
+                    ORDER BY timestamp DESC 
+                    LIMIT ?
+                '''
+                cursor.execute(query, (symbol, timeframe, limit))
+                rows = cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            # Offline mode never creates the DB/schema, so it may simply not exist yet.
+            print(f"DB read error: {e}")
+            return pd.DataFrame(), 0
         
         if not rows:
             return pd.DataFrame(), 0
@@ -85,8 +111,13 @@ class ExchangeClient:
         # Fetch OHLCV data from the exchange.
         # Supports pagination to fetch more than exchange limit.
         # Checks DB first, updates with new data, or fetches full history if sufficient GAP.
+        # In offline mode only the DB is read.
 
-        conn = sqlite3.connect(self.db_path)
+        if self.offline:
+            df_final, _ = self._load_from_db(symbol, timeframe, limit)
+            return df_final
+
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute("SELECT MAX(timestamp), COUNT(*) FROM ohlcv WHERE symbol=? AND timeframe=?", (symbol, timeframe))
         max_ts, count = cursor.fetchone()
@@ -161,6 +192,47 @@ class ExchangeClient:
         df_final, _ = self._load_from_db(symbol, timeframe, limit)
         return df_final
 
+    def _stored_timeframes(self, symbol):
+        try:
+            with closing(self._connect()) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT DISTINCT timeframe FROM ohlcv WHERE symbol=?", (symbol,))
+                rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            return []
+        timeframes = []
+        for (tf,) in rows:
+            try:
+                timeframes.append((timeframe_to_ms(tf), tf))
+            except ValueError:
+                continue
+        return [tf for _, tf in sorted(timeframes)]
+
+    def fetch_ohlcv_resampled(self, symbol, timeframe='1h', limit=100, base_timeframe=None):
+        # Build `timeframe` candles from a finer base series instead of fetching
+        # and storing every timeframe separately.
+        # base_timeframe defaults to the finest timeframe stored for the symbol that
+        # divides `timeframe` (or `timeframe` itself if none does).
+        # Aggregators are cached per (symbol, base) and only re-aggregate new candles.
+        target_ms = timeframe_to_ms(timeframe)
+        if base_timeframe is None:
+            candidates = [tf for tf in self._stored_timeframes(symbol) if target_ms % timeframe_to_ms(tf) == 0]
+            base_timeframe = candidates[0] if candidates else timeframe
+
+        ratio = target_ms // timeframe_to_ms(base_timeframe)
+        # One extra bucket covers a partial first bucket, which the resampler drops
+        rows = (limit + 1) * ratio
+        df_base = self.fetch_ohlcv(symbol, base_timeframe, limit=rows)
+
+        key = (symbol, base_timeframe)
+        if key not in self._aggregators:
+            self._aggregators[key] = TimeframeAggregator(base_timeframe)
+        aggregator = self._aggregators[key]
+        # Keep only as much base history as the largest request needs
+        aggregator.max_rows = max(aggregator.max_rows or 0, rows)
+        aggregator.update(df_base)
+        return aggregator.get(timeframe, limit)
+
     def get_latest_price(self, symbol):
         # Fetch the latest ticker price.
         # 
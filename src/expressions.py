@@ -0,0 +1,531 @@
+import copy
+import hashlib
+import math
+import re
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Small rule language for strategies, e.g.
+#   rsi(14) < 30 & close > ema(200) & volume > 1.5 * sma(volume, 20)
+# Expressions compile into a DAG (ExpressionGraph). Identical
+# sub-expressions, within one rule or across the rules compiled into the same
+# graph, become a single node, so each indicator is computed once per evaluation.
+#
+# Precedence (low -> high): |, &, ~, comparisons, + -, * /, unary -.
+#
+# Series: open, high, low, close, volume
+# Indicators (src defaults to close):
+#   rsi([src,] window=14)   ema([src,] window)   sma([src,] window)   std([src,] window)
+#   bb_high([src,] window=20, dev=2)   bb_low([src,] window=20, dev=2)
+#   macd([src,] fast=12, slow=26)   macd_signal([src,] fast=12, slow=26, sign=9)
+#   prev(x, n=1)   cross_above(a, b)   cross_below(a, b)
+#
+# Indicator formulas follow the `ta` package exactly, so rule strategies give
+# the same signals as the hand-written ones.
+
+SERIES = ('open', 'high', 'low', 'close', 'volume')
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|==|!=|[<>&|~+\-*/(),])
+    )""", re.VERBOSE)
+
+_COMPARISONS = {'<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge', '==': 'eq', '!=': 'ne'}
+_ARITHMETIC = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div'}
+_COMMUTATIVE = {'add', 'mul', 'eq', 'ne', 'and', 'or'}
+_BOOLEAN = set(_COMPARISONS.values()) | {'and', 'or', 'not'}
+
+# --- Parsing -----------------------------------------------------------------
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected character at position {pos} in rule: {text!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        pos = match.end()
+    tokens.append(('end', None, len(text)))
+    return tokens
+
+class _Parser:
+    """Recursive-descent parser producing a plain tuple AST."""
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def parse(self):
+        node = self._or()
+        self._expect('end')
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos]
+
+    def _take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, kind, value=None):
+        token = self._take()
+        if token[0] != kind or (value is not None and token[1] != value):
+            expected = value or kind
+            raise ValueError(f"Expected {expected!r} at position {token[2]} in rule: {self.text!r}")
+        return token
+
+    def _accept(self, *values):
+        token = self._peek()
+        if token[0] == 'op' and token[1] in values:
+            self.pos += 1
+            return token[1]
+        return None
+
+    def _or(self):
+        node = self._and()
+        while self._accept('|'):
+            node = ('bin', 'or', node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._accept('&'):
+            node = ('bin', 'and', node, self._not())
+        return node
+
+    def _not(self):
+        if self._accept('~'):
+            return ('unary', 'not', self._not())
+        return self._comparison()
+
+    def _comparison(self):
+        node = self._sum()
+        op = self._accept(*_COMPARISONS)
+        if op:
+            node = ('bin', _COMPARISONS[op], node, self._sum())
+        return node
+
+    def _sum(self):
+        node = self._product()
+        while True:
+            op = self._accept('+', '-')
+            if not op:
+                return node
+            node = ('bin', _ARITHMETIC[op], node, self._product())
+
+    def _product(self):
+        node = self._unary()
+        while True:
+            op = self._accept('*', '/')
+            if not op:
+                return node
+            node = ('bin', _ARITHMETIC[op], node, self._unary())
+
+    def _unary(self):
+        if self._accept('-'):
+            operand = self._unary()
+            if operand[0] == 'num':
+                return ('num', -operand[1])
+            return ('unary', 'neg', operand)
+        return self._atom()
+
+    def _atom(self):
+        kind, value, position = self._take()
+        if kind == 'number':
+            return ('num', float(value))
+        if kind == 'name':
+            if self._accept('('):
+                args = []
+                if not self._accept(')'):
+                    args.append(self._or())
+                    while self._accept(','):
+                        args.append(self._or())
+                    self._expect('op', ')')
+                return ('call', value, args)
+            return ('name', value)
+        if kind == 'end':
+            raise ValueError(f"Unexpected end of rule: {self.text!r}")
+        if kind == 'op' and value == '(':
+            node = self._or()
+            self._expect('op', ')')
+            return node
+        raise ValueError(f"Unexpected token {value!r} at position {position} in rule: {self.text!r}")
+
+def parse(text):
+    """Parse a rule into a tuple AST (mainly useful for debugging)."""
+    return _Parser(text).parse()
+
+# --- Kernels -----------------------------------------------------------------
+# Stateless ops are NumPy ufuncs and work unchanged on whole arrays (batch) and
+# on single values (streaming). Stateful ops have a batch kernel over arrays
+# and a streaming step that updates a small per-node state dict.
+
+_UFUNCS = {
+    'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'div': np.divide,
+    'lt': np.less, 'le': np.less_equal, 'gt': np.greater, 'ge': np.greater_equal,
+    'eq': np.equal, 'ne': np.not_equal,
+    'and': np.logical_and, 'or': np.logical_or, 'not': np.logical_not, 'neg': np.negative,
+}
+
+def _ewm_alpha(span=None, alpha=None):
+    # Same com round-trip pandas performs, so streaming matches batch bit for bit
+    com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+    return 1. / (1. + com)
+
+def _ewm_batch(x, min_periods, span=None, alpha=None):
+    if span is not None:
+        ewm = pd.Series(x).ewm(span=span, min_periods=min_periods, adjust=False)
+    else:
+        ewm = pd.Series(x).ewm(alpha=alpha, min_periods=min_periods, adjust=False)
+    return ewm.mean().to_numpy()
+
+def _ewm_step(state, x, alpha, min_periods):
+    # Mirrors pandas' adjust=False ewm recursion (ignore_na=False)
+    weighted = state.get('weighted', math.nan)
+    observed = x == x
+    state['nobs'] = state.get('nobs', 0) + observed
+    if weighted == weighted:
+        old_wt = state['old_wt'] * (1. - alpha)
+        if observed:
+            if weighted != x:
+                weighted = ((old_wt * weighted) + (alpha * x)) / (old_wt + alpha)
+            old_wt = 1.
+        state['old_wt'] = old_wt
+    elif observed:
+        weighted = x
+        state['old_wt'] = 1.
+    state['weighted'] = weighted
+    return weighted if state['nobs'] >= min_periods else math.nan
+
+def _ema_batch(params, x):
+    (window,) = params
+    return _ewm_batch(x, window, span=window)
+
+def _ema_step(state, params, x):
+    (window,) = params
+    return _ewm_step(state, x, _ewm_alpha(span=window), window)
+
+def _rsi_value(up, down):
+    if down == 0:
+        return 100.
+    return 100 - (100 / (1 + up / down))
+
+def _rsi_batch(params, x):
+    (window,) = params
+    diff = np.diff(x, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = -np.where(diff < 0, diff, 0.0)
+    emaup = _ewm_batch(up, window, alpha=1 / window)
+    emadn = _ewm_batch(down, window, alpha=1 / window)
+    return np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+
+def _rsi_step(state, params, x):
+    (window,) = params
+    diff = x - state.get('prev', math.nan)
+    state['prev'] = x
+    up = diff if diff > 0 else 0.0
+    down = -diff if diff < 0 else -0.0
+    alpha = _ewm_alpha(alpha=1 / window)
+    emaup = _ewm_step(state.setdefault('up', {}), up, alpha, window)
+    emadn = _ewm_step(state.setdefault('down', {}), down, alpha, window)
+    if emadn != emadn:
+        return math.nan
+    return _rsi_value(emaup, emadn)
+
+def _sma_batch(params, x):
+    (window,) = params
+    return pd.Series(x).rolling(window, min_periods=window).mean().to_numpy()
+
+def _std_batch(params, x):
+    (window,) = params
+    return pd.Series(x).rolling(window, min_periods=window).std(ddof=0).to_numpy()
+
+def _window_step(state, window, x):
+    values = state.setdefault('values', deque(maxlen=window))
+    values.append(x)
+    if len(values) < window or any(v != v for v in values):
+        return None
+    return values
+
+def _sma_step(state, params, x):
+    values = _window_step(state, params[0], x)
+    return math.nan if values is None else math.fsum(values) / len(values)
+
+def _std_step(state, params, x):
+    values = _window_step(state, params[0], x)
+    if values is None:
+        return math.nan
+    mean = math.fsum(values) / len(values)
+    return math.sqrt(math.fsum((v - mean) ** 2 for v in values) / len(values))
+
+def _shift_batch(params, x):
+    (n,) = params
+    out = np.full(len(x), np.nan)
+    if n < len(x):
+        out[n:] = x[:len(x) - n]
+    return out
+
+def _shift_step(state, params, x):
+    (n,) = params
+    values = state.setdefault('values', deque(maxlen=n + 1))
+    values.append(float(x))
+    return values[0] if len(values) == n + 1 else math.nan
+
+_STATEFUL = {
+    'ema': (_ema_batch, _ema_step),
+    'rsi': (_rsi_batch, _rsi_step),
+    'sma': (_sma_batch, _sma_step),
+    'std': (_std_batch, _std_step),
+    'shift': (_shift_batch, _shift_step),
+}
+
+# --- State codecs ------------------------------------------------------------
+# Each stateful node packs its streaming state into a float64 vector whose
+# length depends only on (op, params), so a whole evaluator state is one flat
+# array that can be checkpointed and restored.
+
+def _ewm_pack(state):
+    return [state.get('weighted', math.nan), state.get('old_wt', math.nan), state.get('nobs', 0)]
+
+def _ewm_unpack(values):
+    return {'weighted': values[0], 'old_wt': values[1], 'nobs': int(values[2])}
+
+def _window_len(op, params):
+    return params[0] + 1 if op == 'shift' else params[0]
+
+def _state_size(op, params):
+    if op == 'ema':
+        return 3
+    if op == 'rsi':
+        return 7
+    return 1 + _window_len(op, params)
+
+def _pack_state(op, params, state):
+    if op == 'ema':
+        return _ewm_pack(state)
+    if op == 'rsi':
+        return [state.get('prev', math.nan)] + _ewm_pack(state.get('up', {})) + _ewm_pack(state.get('down', {}))
+    maxlen = _window_len(op, params)
+    values = list(state.get('values', ()))
+    return [len(values)] + values + [math.nan] * (maxlen - len(values))
+
+def _unpack_state(op, params, values):
+    values = [float(v) for v in values]
+    if op == 'ema':
+        return _ewm_unpack(values)
+    if op == 'rsi':
+        return {'prev': values[0], 'up': _ewm_unpack(values[1:4]), 'down': _ewm_unpack(values[4:7])}
+    return {'values': deque(values[1:1 + int(values[0])], maxlen=_window_len(op, params))}
+
+# --- Graph -------------------------------------------------------------------
+
+class ExpressionGraph:
+    """
+    DAG of hash-consed nodes. Node ids are assigned in creation order, so
+    sorting ids gives a valid evaluation order.
+    """
+    def __init__(self):
+        self.nodes = [] # id -> (op, args, params)
+        self._index = {}
+
+    def _node(self, op, args=(), params=()):
+        if op in _COMMUTATIVE:
+            args = tuple(sorted(args))
+        key = (op, tuple(args), tuple(params))
+        if key not in self._index:
+            self._index[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self._index[key]
+
+    def compile(self, text):
+        """Compile a rule string and return the id of its output node."""
+        return self._build(parse(text))
+
+    def _build(self, ast):
+        kind = ast[0]
+        if kind == 'num':
+            return self._node('const', params=(ast[1],))
+        if kind == 'name':
+            if ast[1] not in SERIES:
+                raise ValueError(f"Unknown series: {ast[1]}")
+            return self._node('col', params=(ast[1],))
+        if kind in ('unary', 'bin'):
+            return self._node(ast[1], self._operands(ast[1], ast[2:]))
+        return self._call(ast[1], ast[2])
+
+    def is_boolean(self, node_id):
+        """True if the node yields a condition (comparison or &, |, ~ of conditions)."""
+        return self.nodes[node_id][0] in _BOOLEAN
+
+    def _operands(self, op, asts):
+        ids = tuple(self._build(a) for a in asts)
+        if op in ('and', 'or', 'not') and not all(self.is_boolean(i) for i in ids):
+            symbol = {'and': '&', 'or': '|', 'not': '~'}[op]
+            raise ValueError(f"Operands of {symbol!r} must be conditions, e.g. close > ema(200)")
+        return ids
+
+    def _call(self, name, args):
+        if name == 'prev':
+            (n,) = self._windows(name, self._numbers(name, args[1:], (1,)))
+            return self._node('shift', (self._build(args[0]),), (n,))
+        if name in ('cross_above', 'cross_below'):
+            if len(args) != 2:
+                raise ValueError(f"{name} expects 2 arguments")
+            a, b = self._build(args[0]), self._build(args[1])
+            prev_a, prev_b = self._node('shift', (a,), (1,)), self._node('shift', (b,), (1,))
+            if name == 'cross_above':
+                return self._node('and', (self._node('lt', (prev_a, prev_b)), self._node('gt', (a, b))))
+            return self._node('and', (self._node('gt', (prev_a, prev_b)), self._node('lt', (a, b))))
+
+        defaults = {
+            'rsi': (14,), 'ema': (None,), 'sma': (None,), 'std': (None,),
+            'bb_high': (20, 2), 'bb_low': (20, 2),
+            'macd': (12, 26), 'macd_signal': (12, 26, 9),
+        }
+        if name not in defaults:
+            raise ValueError(f"Unknown function: {name}")
+        if args and args[0][0] != 'num':
+            src, args = self._build(args[0]), args[1:]
+        else:
+            src = self._node('col', params=('close',))
+        numbers = self._numbers(name, args, defaults[name])
+
+        if name in ('rsi', 'ema', 'sma', 'std'):
+            (window,) = self._windows(name, numbers)
+            return self._node(name, (src,), (window,))
+        if name in ('bb_high', 'bb_low'):
+            (window,) = self._windows(name, numbers[:1])
+            dev = numbers[1]
+            mavg = self._node('sma', (src,), (window,))
+            width = self._node('mul', (self._node('const', params=(dev,)), self._node('std', (src,), (window,))))
+            return self._node('add' if name == 'bb_high' else 'sub', (mavg, width))
+        fast, slow = self._windows(name, numbers[:2])
+        macd = self._node('sub', (self._node('ema', (src,), (fast,)), self._node('ema', (src,), (slow,))))
+        if name == 'macd':
+            return macd
+        (sign,) = self._windows(name, numbers[2:])
+        return self._node('ema', (macd,), (sign,))
+
+    def _numbers(self, name, args, defaults):
+        if len(args) > len(defaults) or any(a[0] != 'num' for a in args):
+            raise ValueError(f"{name} expects up to {len(defaults)} numeric parameters")
+        numbers = [a[1] for a in args] + list(defaults[len(args):])
+        if any(n is None for n in numbers):
+            raise ValueError(f"{name} is missing a required parameter")
+        return numbers
+
+    @staticmethod
+    def _windows(name, numbers):
+        # Windows and lags must be whole, positive bar counts
+        for n in numbers:
+            if n != int(n) or n < 1:
+                raise ValueError(f"{name} expects positive whole numbers of bars, got {n:g}")
+        return [int(n) for n in numbers]
+
+    def _required(self, outputs):
+        needed = set()
+        stack = list(outputs)
+        while stack:
+            node_id = stack.pop()
+            if node_id not in needed:
+                needed.add(node_id)
+                stack.extend(self.nodes[node_id][1])
+        return sorted(needed)
+
+    def evaluate(self, df, outputs):
+        """
+        Batch mode: evaluate the {name: node id} outputs over a whole OHLCV
+        DataFrame. Every node they depend on is computed exactly once.
+        """
+        values = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for node_id in self._required(outputs.values()):
+                op, args, params = self.nodes[node_id]
+                if op == 'col':
+                    values[node_id] = df[params[0]].to_numpy(dtype=float)
+                elif op == 'const':
+                    values[node_id] = params[0]
+                elif op in _STATEFUL:
+                    values[node_id] = _STATEFUL[op][0](params, np.asarray(values[args[0]], dtype=float))
+                else:
+                    values[node_id] = _UFUNCS[op](*(values[a] for a in args))
+        # Outputs built from constants only are scalars; give every output full length
+        return {name: np.broadcast_to(values[node_id], len(df)) for name, node_id in outputs.items()}
+
+    def stream(self, outputs):
+        """Streaming mode: returns a StreamEvaluator for the {name: node id} outputs."""
+        return StreamEvaluator(self, outputs)
+
+class StreamEvaluator:
+    """
+    Evaluates outputs one candle at a time with O(1) work per node (O(window)
+    for sma/std, which sum their window exactly to match batch), keeping
+    only a small state dict for each stateful node.
+    """
+    def __init__(self, graph, outputs):
+        self.graph = graph
+        self.outputs = dict(outputs)
+        self.order = graph._required(self.outputs.values())
+        self.states = {node_id: {} for node_id in self.order if graph.nodes[node_id][0] in _STATEFUL}
+
+    def update(self, candle):
+        """Feed one candle (mapping or row with OHLCV fields) and return the latest output values."""
+        values = {}
+        nodes = self.graph.nodes
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for node_id in self.order:
+                op, args, params = nodes[node_id]
+                if op == 'col':
+                    value = candle[params[0]] if isinstance(candle, (dict, pd.Series)) else getattr(candle, params[0])
+                    values[node_id] = np.float64(value)
+                elif op == 'const':
+                    values[node_id] = params[0]
+                elif op in _STATEFUL:
+                    values[node_id] = np.float64(_STATEFUL[op][1](self.states[node_id], params, float(values[args[0]])))
+                else:
+                    values[node_id] = _UFUNCS[op](*(values[a] for a in args))
+        return {name: values[node_id] for name, node_id in self.outputs.items()}
+
+    def peek(self, candle):
+        """Like update(), but leaves the state untouched (e.g. for a still-forming candle)."""
+        saved = copy.deepcopy(self.states)
+        try:
+            return self.update(candle)
+        finally:
+            self.states = saved
+
+    def signature(self):
+        """Hash of the evaluated sub-graph; changes whenever the rules or their parameters do."""
+        local = {node_id: i for i, node_id in enumerate(self.order)}
+        layout = []
+        for node_id in self.order:
+            op, args, params = self.graph.nodes[node_id]
+            layout.append((op, tuple(local[a] for a in args), params))
+        outputs = sorted((name, local[node_id]) for name, node_id in self.outputs.items())
+        return hashlib.sha256(repr((layout, outputs)).encode()).hexdigest()
+
+    def get_state(self):
+        """All streaming state as one flat float64 array (in evaluation order)."""
+        packed = []
+        for node_id, state in self.states.items():
+            op, _, params = self.graph.nodes[node_id]
+            packed.extend(_pack_state(op, params, state))
+        return np.array(packed, dtype=np.float64)
+
+    def set_state(self, values):
+        """Restore state produced by get_state() of an evaluator with the same signature."""
+        sizes = [_state_size(self.graph.nodes[node_id][0], self.graph.nodes[node_id][2]) for node_id in self.states]
+        if len(values) != sum(sizes):
+            raise ValueError(f"State has {len(values)} values, expected {sum(sizes)}")
+        pos = 0
+        for node_id, size in zip(list(self.states), sizes):
+            op, _, params = self.graph.nodes[node_id]
+            self.states[node_id] = _unpack_state(op, params, values[pos:pos + size])
+            pos += size
@@ -0,0 +1,109 @@
+import numpy as np
+from .resampler import timeframe_to_ms
+
+YEAR_MS = 365 * 24 * 60 * 60 * 1000 # crypto trades every day
+
+def periods_per_year(timeframe=None, timestamps=None):
+    """
+    Bars per year, from a timeframe string ('1h' -> 8760) or, failing that,
+    the median spacing of the timestamps. Falls back to 1 (no annualization).
+    """
+    if timeframe:
+        return YEAR_MS / timeframe_to_ms(timeframe)
+    if timestamps is not None and len(timestamps) > 1:
+        ms = np.diff(np.asarray(timestamps, dtype='datetime64[ms]').astype(np.int64))
+        step = np.median(ms)
+        if step > 0:
+            return YEAR_MS / step
+    return 1.0
+
+def trade_returns(exit_equity, initial_capital):
+    """
+    Net equity return of each closed round trip (fees, slippage and sizing
+    included), from the equity after each exit (Backtester.exit_equity).
+    """
+    exits = np.asarray(exit_equity, dtype=float)
+    return exits / np.r_[initial_capital, exits[:-1]] - 1
+
+def pad_trade_returns(per_curve):
+    """Stack ragged per-curve trade returns into a NaN-padded 2D array for compute_metrics."""
+    width = max((len(r) for r in per_curve), default=0)
+    out = np.full((len(per_curve), width), np.nan)
+    for i, returns in enumerate(per_curve):
+        out[i, :len(returns)] = returns
+    return out
+
+def compute_metrics(equity, periods_per_year=1.0, initial=None, exposure=None, trade_returns=None):
+    """
+    Risk/return metrics for one equity curve (1D) or many at once (2D, one
+    curve per row), computed with NumPy along the time axis.
+
+    equity:        equity values per bar
+    initial:       starting capital (defaults to the first equity value)
+    exposure:      bool array, True where a position is open
+    trade_returns: per-trade net returns (2D NaN-padded when batched)
+
+    Returns a dict of floats (1D input) or arrays with one value per curve.
+    Percentages are in %, drawdown is negative, durations are in bars.
+    """
+    equity = np.asarray(equity, dtype=float)
+    single = equity.ndim == 1
+    equity = np.atleast_2d(equity)
+    n_curves, n_bars = equity.shape
+    initial = equity[:, 0] if initial is None else np.broadcast_to(np.asarray(initial, dtype=float), (n_curves,))
+    ann = np.sqrt(periods_per_year)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        returns = equity[:, 1:] / equity[:, :-1] - 1
+        n_returns = returns.shape[1]
+        mean = returns.mean(axis=1) if n_returns else np.zeros(n_curves)
+        std = returns.std(axis=1, ddof=1) if n_returns > 1 else np.zeros(n_curves)
+        downside = np.sqrt((np.minimum(returns, 0.0) ** 2).mean(axis=1)) if n_returns else np.zeros(n_curves)
+
+        growth = equity[:, -1] / initial
+        years = n_returns / periods_per_year
+        cagr = np.where((years > 0) & (growth > 0), growth ** (1 / years) - 1, np.nan) if years else np.full(n_curves, np.nan)
+
+        # Drawdown depth and duration (bars since the last peak)
+        peak = np.maximum.accumulate(equity, axis=1)
+        drawdown = (equity - peak) / peak
+        max_drawdown = drawdown.min(axis=1)
+        bars = np.arange(n_bars)
+        last_peak = np.maximum.accumulate(np.where(equity >= peak, bars, 0), axis=1)
+        max_dd_duration = (bars - last_peak).max(axis=1)
+
+        metrics = {
+            'total_return': (growth - 1) * 100,
+            'cagr': cagr * 100,
+            'volatility': std * ann * 100,
+            'sharpe': np.where(std > 0, mean / std * ann, 0.0),
+            'sortino': np.where(downside > 0, mean / downside * ann, 0.0),
+            'max_drawdown': max_drawdown * 100,
+            'max_dd_duration': max_dd_duration,
+            'calmar': np.where(max_drawdown < 0, cagr / -max_drawdown, np.nan),
+        }
+
+        if exposure is not None:
+            metrics['exposure'] = np.atleast_2d(np.asarray(exposure, dtype=bool)).mean(axis=1) * 100
+
+        if trade_returns is not None:
+            trades = np.atleast_2d(np.asarray(trade_returns, dtype=float))
+            if trades.shape[0] != n_curves:
+                raise ValueError(f"trade_returns has {trades.shape[0]} rows for {n_curves} equity curves")
+            count = (~np.isnan(trades)).sum(axis=1)
+            wins = np.where(trades > 0, trades, 0.0).sum(axis=1)
+            losses = -np.where(trades < 0, trades, 0.0).sum(axis=1)
+            n_wins = (trades > 0).sum(axis=1)
+            n_losses = (trades < 0).sum(axis=1)
+            metrics.update({
+                'trades': count,
+                'win_rate': np.where(count > 0, n_wins / count * 100, 0.0),
+                'profit_factor': np.where(losses > 0, wins / losses, np.where(wins > 0, np.inf, np.nan)),
+                'avg_trade': np.where(count > 0, np.nansum(trades, axis=1) / count * 100, 0.0),
+                'avg_win': np.where(n_wins > 0, wins / n_wins * 100, 0.0),
+                'avg_loss': np.where(n_losses > 0, -losses / n_losses * 100, 0.0),
+            })
+
+    if single:
+        return {name: value[0].item() for name, value in metrics.items()}
+    return metrics
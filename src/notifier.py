@@ -1,8 +1,5 @@
 import logging
 import os
-import requests
-import smtplib
-from email.mime.text import MIMEText
 from datetime import datetime
 
 class Notifier:
@@ -56,6 +53,7 @@ class Notifier:
     def send_telegram(self, message):
         if self.telegram_token and self.telegram_chat_id:
             try:
+                import requests
                 url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
                 payload = {
                     "chat_id": self.telegram_chat_id,
@@ -68,6 +66,8 @@ class Notifier:
     def send_email(self, subject, body):
         if self.email_host and self.email_user and self.email_password and self.email_to:
             try:
+                import smtplib
+                from email.mime.text import MIMEText
                 msg = MIMEText(body)
                 msg['Subject'] = subject
                 msg['From'] = self.email_user
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+# Fixed-length units only. Weeks/months are not epoch-aligned on the exchange,
+# so bucketing them by epoch floor would not reproduce its candles.
+TIMEFRAME_UNITS_MS = {
+    'm': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+}
+
+def timeframe_to_ms(timeframe):
+    # '5m' -> 300000. Same result as ccxt's parse_timeframe * 1000, without importing ccxt.
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in TIMEFRAME_UNITS_MS or not amount.isdigit() or int(amount) <= 0:
+        raise ValueError(f"Unsupported timeframe for resampling: {timeframe}")
+    return int(amount) * TIMEFRAME_UNITS_MS[unit]
+
+def _timestamps_ms(timestamps):
+    return np.asarray(timestamps, dtype='datetime64[ms]').astype(np.int64)
+
+def resample_ohlcv(df, timeframe, drop_partial_head=True):
+    """
+    Aggregate an OHLCV DataFrame (sorted by timestamp) into a coarser timeframe.
+    Vectorized: bucket boundaries are found once and every column is reduced with
+    ufunc.reduceat. Leading candles of a bucket that started before the data are
+    dropped so the first output candle is never partial; the last one may still
+    be forming, just like the exchange's open candle.
+    Pass drop_partial_head=False when df is known to start at a bucket boundary
+    (a missing first base candle is then an exchange gap, not a partial bucket).
+    """
+    if df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    tf_ms = timeframe_to_ms(timeframe)
+    ts = _timestamps_ms(df['timestamp'])
+
+    start = 0
+    if drop_partial_head:
+        first_boundary = -(-ts[0] // tf_ms) * tf_ms
+        start = np.searchsorted(ts, first_boundary)
+    if start == len(ts):
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    ts = ts[start:]
+
+    buckets = ts // tf_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    opens = df['open'].to_numpy(dtype=float)[start:]
+    highs = df['high'].to_numpy(dtype=float)[start:]
+    lows = df['low'].to_numpy(dtype=float)[start:]
+    closes = df['close'].to_numpy(dtype=float)[start:]
+    volumes = df['volume'].to_numpy(dtype=float)[start:]
+
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(buckets[starts] * tf_ms, unit='ms'),
+        'open': opens[starts],
+        'high': np.maximum.reduceat(highs, starts),
+        'low': np.minimum.reduceat(lows, starts),
+        'close': closes[ends],
+        'volume': np.add.reduceat(volumes, starts),
+    })
+
+def align_to_base(coarse_timestamps, values, base_timestamps, timeframe):
+    """
+    Project values computed on a coarse series back onto base candles.
+    Each base candle gets the value of the last coarse candle that had fully
+    closed at its open time, so there is no lookahead into a forming candle.
+    """
+    coarse_close = _timestamps_ms(coarse_timestamps) + timeframe_to_ms(timeframe)
+    idx = np.searchsorted(coarse_close, _timestamps_ms(base_timestamps), side='right') - 1
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(idx), np.nan)
+    valid = idx >= 0
+    out[valid] = values[idx[valid]]
+    return out
+
+class TimeframeAggregator:
+    """
+    Builds and caches higher timeframes from a single base series.
+    Feed new base candles with update(); cached timeframes are only recomputed
+    from the first bucket touched by the new candles.
+    max_rows caps the stored base history (None keeps everything), so a
+    long-running scanner doesn't grow it forever. Cached timeframes always equal
+    resample_ohlcv(self.base, timeframe).
+    """
+    def __init__(self, base_timeframe='1m', max_rows=None):
+        self.base_timeframe = base_timeframe
+        self.base_ms = timeframe_to_ms(base_timeframe)
+        self.max_rows = max_rows
+        self.base = pd.DataFrame(columns=OHLCV_COLUMNS)
+        self._cache = {}
+
+    def update(self, df):
+        """
+        Merge base candles into the series. Rows older than the last stored
+        candle are ignored (closed candles don't change); the last stored
+        candle is replaced since it may still have been forming.
+        If df reaches further back than the stored history, everything is rebuilt.
+        """
+        if df.empty:
+            return
+        df = df[OHLCV_COLUMNS]
+
+        if self.base.empty or df['timestamp'].iloc[0] < self.base['timestamp'].iloc[0]:
+            self.base = df.reset_index(drop=True)
+            self._cache.clear()
+            self._trim()
+            return
+
+        last_ts = self.base['timestamp'].iloc[-1]
+        df = df[df['timestamp'] >= last_ts]
+        if df.empty:
+            return
+
+        keep = self.base['timestamp'].searchsorted(df['timestamp'].iloc[0])
+        self.base = pd.concat([self.base.iloc[:keep], df], ignore_index=True)
+
+        first_new_ms = _timestamps_ms(df['timestamp'].iloc[:1])[0]
+        for timeframe, cached in self._cache.items():
+            tf_ms = timeframe_to_ms(timeframe)
+            cutoff = pd.to_datetime(first_new_ms // tf_ms * tf_ms, unit='ms')
+            first = self.base['timestamp'].searchsorted(cutoff)
+            kept = cached.iloc[:cached['timestamp'].searchsorted(cutoff)]
+            # Only the start of the stored history can hold a partial bucket;
+            # further in, a bucket missing its first base candle is a gap and is kept
+            fresh = resample_ohlcv(self.base.iloc[first:], timeframe, drop_partial_head=first == 0)
+            self._cache[timeframe] = pd.concat([kept, fresh], ignore_index=True)
+        self._trim()
+
+    def _trim(self):
+        # Drop the oldest base candles beyond max_rows, but keep every cached
+        # timeframe's last bucket whole since the next update recomputes it.
+        if self.max_rows is None or len(self.base) <= self.max_rows:
+            return
+        cut = self.base['timestamp'].iloc[len(self.base) - self.max_rows]
+        for cached in self._cache.values():
+            if not cached.empty:
+                cut = min(cut, cached['timestamp'].iloc[-1])
+        self.base = self.base.iloc[self.base['timestamp'].searchsorted(cut):].reset_index(drop=True)
+
+        # Cached candles before the first whole bucket of the trimmed base go too
+        start_ms = _timestamps_ms(self.base['timestamp'].iloc[:1])[0]
+        for timeframe, cached in self._cache.items():
+            tf_ms = timeframe_to_ms(timeframe)
+            first_full = pd.to_datetime(-(-start_ms // tf_ms) * tf_ms, unit='ms')
+            self._cache[timeframe] = cached.iloc[cached['timestamp'].searchsorted(first_full):].reset_index(drop=True)
+
+    def get(self, timeframe, limit=None):
+        """Return candles for any timeframe that is a multiple of the base timeframe."""
+        if timeframe == self.base_timeframe:
+            result = self.base
+        else:
+            if timeframe_to_ms(timeframe) % self.base_ms != 0:
+                raise ValueError(f"{timeframe} is not a multiple of base timeframe {self.base_timeframe}")
+            if timeframe not in self._cache:
+                self._cache[timeframe] = resample_ohlcv(self.base, timeframe)
+            result = self._cache[timeframe]
+
+        if limit is not None:
+            result = result.iloc[-limit:]
+        return result.reset_index(drop=True)
@@ -0,0 +1,206 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from .metrics import trade_returns
+
+METRICS = ['total_return', 'max_drawdown', 'sharpe']
+
+def _block_stats(log_returns, length):
+    """
+    Summaries of every block of `length` consecutive log returns (one row per
+    start index): total S, max and min prefix sum, and the worst drawdown
+    inside the block. These are enough to get return and drawdown of any
+    concatenation of blocks without rebuilding the path.
+    """
+    cum = np.concatenate([[0.0], np.cumsum(log_returns)])
+    n_starts = len(log_returns) - length + 1
+    total = cum[length:] - cum[:n_starts]
+    max_prefix = np.empty(n_starts)
+    min_prefix = np.empty(n_starts)
+    drawdown = np.empty(n_starts)
+    windows = sliding_window_view(cum[1:], length)
+    rows = max(1, 4_000_000 // length) # bound memory of the (rows, length) temporaries
+    for start in range(0, n_starts, rows):
+        stop = min(start + rows, n_starts)
+        levels = windows[start:stop] - cum[start:stop, None]
+        peaks = np.maximum.accumulate(levels, axis=1)
+        max_prefix[start:stop] = peaks[:, -1]
+        min_prefix[start:stop] = levels.min(axis=1)
+        drawdown[start:stop] = (levels - peaks).min(axis=1)
+    return total, max_prefix, min_prefix, drawdown
+
+def _path_metrics(total, max_prefix, min_prefix, drawdown):
+    """
+    Compose per-block stats (arrays of shape (samples, blocks), in path order)
+    into each path's final log level and worst log drawdown.
+    """
+    level = np.cumsum(total, axis=1)
+    before = level - total # level at the start of each block
+    peak = np.maximum.accumulate(before + max_prefix, axis=1)
+    peak_before = np.maximum(np.concatenate([np.zeros((len(peak), 1)), peak[:, :-1]], axis=1), 0.0)
+    worst = np.minimum(before - peak_before + min_prefix, drawdown).min(axis=1)
+    return level[:, -1], np.minimum(worst, 0.0)
+
+def _sharpe(mean, var):
+    std = np.sqrt(np.maximum(var, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, mean / std, 0.0)
+
+class RobustnessAnalyzer:
+    """
+    Monte Carlo robustness checks for a backtest:
+    - block bootstrap of the per-bar equity returns (keeps short-range autocorrelation)
+    - resampling of the closed-trade sequence (bootstrap or shuffle)
+    Each resample yields total return, max drawdown (both in %) and Sharpe,
+    reported as confidence intervals. Bar-level Sharpe is annualized with
+    periods_per_year; if it isn't given, run() uses the Backtester's and the
+    other methods don't annualize. Samples are split
+    into chunks that run on a thread pool; NumPy releases the GIL for the
+    heavy array work.
+    """
+    def __init__(self, n_samples=10000, confidence=0.95, block_size=None, seed=None, workers=None, periods_per_year=None):
+        self.n_samples = n_samples
+        self.periods_per_year = periods_per_year
+        self.confidence = confidence
+        self.block_size = block_size # default: n ** (1/3) bars
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+
+    def _parallel(self, func, chunk_rows):
+        # Independent random streams per chunk. The split depends only on the
+        # sample count and chunk size, so a seed gives the same samples whatever
+        # the worker count; workers only change how chunks are scheduled.
+        n_chunks = max(1, -(-self.n_samples // chunk_rows))
+        sizes = [len(part) for part in np.array_split(np.arange(self.n_samples), n_chunks)]
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda args: func(np.random.default_rng(args[0]), args[1]), zip(seeds, sizes)))
+        return {name: np.concatenate([r[name] for r in results]) for name in METRICS}
+
+    def bootstrap_returns(self, equity, periods_per_year=None):
+        """Moving-block bootstrap of the bar returns of an equity curve."""
+        annualize = np.sqrt(periods_per_year or self.periods_per_year or 1.0)
+        equity = np.asarray(equity, dtype=float)
+        returns = equity[1:] / equity[:-1] - 1
+        n = len(returns)
+        if n < 2:
+            raise ValueError("Need at least 3 equity points to bootstrap")
+        block = int(self.block_size or max(1, round(n ** (1 / 3))))
+        block = min(block, n)
+        n_full, rest = divmod(n, block)
+
+        with np.errstate(divide='ignore'):
+            log_returns = np.log1p(returns)
+        sum_r = np.concatenate([[0.0], np.cumsum(returns)])
+        sum_r2 = np.concatenate([[0.0], np.cumsum(returns ** 2)])
+        lengths = [block] + ([rest] if rest else [])
+        stats = {}
+        for length in lengths:
+            starts = n - length + 1
+            stats[length] = _block_stats(log_returns, length) + (
+                sum_r[length:] - sum_r[:starts], sum_r2[length:] - sum_r2[:starts])
+
+        def run_chunk(rng, size):
+            picks = [(block, rng.integers(0, n - block + 1, size=(size, n_full)))]
+            if rest:
+                picks.append((rest, rng.integers(0, n - rest + 1, size=(size, 1))))
+            parts = [[s[idx] for s in stats[length]] for length, idx in picks]
+            total, max_prefix, min_prefix, drawdown, s1, s2 = (
+                np.concatenate([p[i] for p in parts], axis=1) for i in range(6))
+            level, worst = _path_metrics(total, max_prefix, min_prefix, drawdown)
+            s1, s2 = s1.sum(axis=1), s2.sum(axis=1)
+            mean = s1 / n
+            return {
+                'total_return': np.expm1(level) * 100,
+                'max_drawdown': np.expm1(worst) * 100,
+                'sharpe': _sharpe(mean, (s2 - n * mean ** 2) / (n - 1)) * annualize,
+            }
+
+        return self._parallel(run_chunk, max(1, 2_000_000 // (n_full + 1)))
+
+    def resample_trades(self, returns, method='bootstrap'):
+        """
+        Resample a sequence of per-trade returns. 'bootstrap' draws trades with
+        replacement; 'shuffle' permutes them (same final return, different path).
+        """
+        returns = np.asarray(returns, dtype=float)
+        n = len(returns)
+        if n < 2:
+            raise ValueError("Need at least 2 closed trades to resample")
+        if method not in ('bootstrap', 'shuffle'):
+            raise ValueError(f"Unknown resampling method: {method}")
+        with np.errstate(divide='ignore'):
+            log_returns = np.log1p(returns)
+
+        def run_chunk(rng, size):
+            if method == 'bootstrap':
+                idx = rng.integers(0, n, size=(size, n))
+            else:
+                idx = rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+            sampled = returns[idx]
+            level = np.cumsum(log_returns[idx], axis=1)
+            peak = np.maximum(np.maximum.accumulate(level, axis=1), 0.0)
+            return {
+                'total_return': np.expm1(level[:, -1]) * 100,
+                'max_drawdown': np.expm1(np.minimum((level - peak).min(axis=1), 0.0)) * 100,
+                'sharpe': _sharpe(sampled.mean(axis=1), sampled.var(axis=1, ddof=1)),
+            }
+
+        return self._parallel(run_chunk, max(1, 2_000_000 // n))
+
+    @staticmethod
+    def observed(returns, periods_per_year=1.0):
+        """Total return (%), max drawdown (%) and Sharpe of one return sequence."""
+        returns = np.asarray(returns, dtype=float)
+        equity = np.concatenate([[1.0], np.cumprod(1 + returns)])
+        peak = np.maximum.accumulate(equity)
+        return {
+            'total_return': (equity[-1] - 1) * 100,
+            'max_drawdown': ((equity - peak) / peak).min() * 100,
+            'sharpe': float(_sharpe(returns.mean(), returns.var(ddof=1)) * np.sqrt(periods_per_year)) if len(returns) > 1 else 0.0,
+        }
+
+    def summarize(self, samples, observed=None):
+        """Confidence intervals per metric as a DataFrame."""
+        tail = (1 - self.confidence) / 2 * 100
+        rows = {}
+        for name in METRICS:
+            values = samples[name]
+            lower, median, upper = np.nanpercentile(values, [tail, 50, 100 - tail])
+            rows[name] = {
+                'observed': observed[name] if observed else np.nan,
+                'mean': np.nanmean(values),
+                'median': median,
+                'lower': lower,
+                'upper': upper,
+            }
+        summary = pd.DataFrame(rows).T
+        summary.attrs['prob_loss'] = float(np.mean(samples['total_return'] < 0) * 100)
+        return summary
+
+    def run(self, backtester):
+        """
+        Analyze a Backtester after run(): block bootstrap of its equity curve and
+        bootstrap of its closed trades. Prints and returns both summaries.
+        """
+        periods_per_year = self.periods_per_year or backtester.periods_per_year
+        equity = np.asarray(backtester.equity_curve['equity'], dtype=float)
+        bar_returns = equity[1:] / equity[:-1] - 1
+        results = {'returns': self.summarize(self.bootstrap_returns(equity, periods_per_year),
+                                             self.observed(bar_returns, periods_per_year))}
+
+        per_trade = trade_returns(backtester.exit_equity, backtester.initial_capital)
+        if len(per_trade) >= 2:
+            results['trades'] = self.summarize(self.resample_trades(per_trade), self.observed(per_trade))
+
+        pct = self.confidence * 100
+        print("-" * 30)
+        print(f"Robustness: {backtester.strategy.name} ({self.n_samples} resamples, {pct:.0f}% CI)")
+        for label, summary in results.items():
+            print(f"[{label}] P(loss): {summary.attrs['prob_loss']:.1f}%")
+            for name, row in summary.iterrows():
+                print(f"  {name:<13} observed {row['observed']:>9.2f} | CI [{row['lower']:>9.2f}, {row['upper']:>9.2f}]")
+        print("-" * 30)
+        return results
@@ -1,5 +1,8 @@
-import ta
 import pandas as pd
+from .resampler import resample_ohlcv, align_to_base
+from .expressions import ExpressionGraph
+
+# `ta` is imported inside each analyze() so that loading a strategy stays cheap.
 
 class BaseStrategy:
     def __init__(self, name):
@@ -31,6 +34,7 @@ class RSIStrategy(BaseStrategy):
         if df.empty:
             return df
         
+        import ta
         df = df.copy()
         # Calculate RSI
         rsi_indicator = ta.momentum.RSIIndicator(close=df['close'], window=self.period)
@@ -43,6 +47,11 @@ class RSIStrategy(BaseStrategy):
         
         return df
 
+    def to_rules(self):
+        rsi = f"rsi({self.period})"
+        return RuleStrategy(self.name, buy=f"{rsi} < {self.buy_threshold}", sell=f"{rsi} > {self.sell_threshold}",
+                            columns={'rsi': rsi})
+
 class MACDStrategy(BaseStrategy):
     def __init__(self, fast=12, slow=26, signal=9):
         super().__init__("MACD Strategy")
@@ -54,6 +63,7 @@ class MACDStrategy(BaseStrategy):
         if df.empty:
             return df
         
+        import ta
         df = df.copy()
         # Calculate MACD
         macd_indicator = ta.trend.MACD(close=df['close'], window_slow=self.slow, window_fast=self.fast, window_sign=self.signal)
@@ -76,6 +86,12 @@ class MACDStrategy(BaseStrategy):
         
         return df
 
+    def to_rules(self):
+        macd = f"macd({self.fast}, {self.slow})"
+        macd_signal = f"macd_signal({self.fast}, {self.slow}, {self.signal})"
+        return RuleStrategy(self.name, buy=f"cross_above({macd}, {macd_signal})", sell=f"cross_below({macd}, {macd_signal})",
+                            columns={'macd': macd, 'macd_signal': macd_signal})
+
 class BollingerRSIStrategy(BaseStrategy):
     def __init__(self, bb_window=20, bb_std=2, rsi_window=14, rsi_buy=30, rsi_sell=70):
         super().__init__("Bollinger+RSI Scalping")
@@ -89,6 +105,7 @@ class BollingerRSIStrategy(BaseStrategy):
         if df.empty:
             return df
         
+        import ta
         df = df.copy()
         
         # Calculate Bollinger Bands
@@ -110,19 +127,30 @@ class BollingerRSIStrategy(BaseStrategy):
         
         return df
 
+    def to_rules(self):
+        bb_high = f"bb_high({self.bb_window}, {self.bb_std})"
+        bb_low = f"bb_low({self.bb_window}, {self.bb_std})"
+        rsi = f"rsi({self.rsi_window})"
+        return RuleStrategy(self.name, buy=f"close <= {bb_low} & {rsi} < {self.rsi_buy}",
+                            sell=f"close >= {bb_high} & {rsi} > {self.rsi_sell}",
+                            columns={'bb_high': bb_high, 'bb_low': bb_low, 'rsi': rsi})
+
 class EnhancedTrendRSIStrategy(BaseStrategy):
-    def __init__(self, rsi_period=14, ema_period=200, buy_threshold=30, sell_threshold=70, vol_ma=20):
+    def __init__(self, rsi_period=14, ema_period=200, buy_threshold=30, sell_threshold=70, vol_ma=20, trend_timeframe=None):
         super().__init__("Enhanced Trend RSI")
         self.rsi_period = rsi_period
         self.ema_period = ema_period
         self.buy_threshold = buy_threshold
         self.sell_threshold = sell_threshold
         self.vol_ma = vol_ma
+        # e.g. '4h': compute the trend EMA on a coarser series resampled from df
+        self.trend_timeframe = trend_timeframe
 
     def analyze(self, df):
         if df.empty:
             return df
         
+        import ta
         df = df.copy()
         
         # 1. RSI
@@ -130,8 +158,14 @@ class EnhancedTrendRSIStrategy(BaseStrategy):
         df['rsi'] = rsi_indicator.rsi()
         
         # 2. EMA Trend
-        ema_indicator = ta.trend.EMAIndicator(close=df['close'], window=self.ema_period)
-        df['ema_trend'] = ema_indicator.ema_indicator()
+        if self.trend_timeframe:
+            # Higher-timeframe EMA, using only fully closed coarse candles
+            coarse = resample_ohlcv(df, self.trend_timeframe)
+            ema_indicator = ta.trend.EMAIndicator(close=coarse['close'], window=self.ema_period)
+            df['ema_trend'] = align_to_base(coarse['timestamp'], ema_indicator.ema_indicator(), df['timestamp'], self.trend_timeframe)
+        else:
+            ema_indicator = ta.trend.EMAIndicator(close=df['close'], window=self.ema_period)
+            df['ema_trend'] = ema_indicator.ema_indicator()
         
         # 3. Volume Average
         df['vol_avg'] = df['volume'].rolling(window=self.vol_ma).mean()
@@ -149,3 +183,80 @@ class EnhancedTrendRSIStrategy(BaseStrategy):
         df.loc[sell_cond, 'signal'] = 'sell'
         
         return df
+
+    def to_rules(self):
+        if self.trend_timeframe:
+            raise ValueError("trend_timeframe has no rule equivalent (rules run on a single timeframe)")
+        rsi = f"rsi({self.rsi_period})"
+        ema = f"ema({self.ema_period})"
+        vol_avg = f"sma(volume, {self.vol_ma})"
+        return RuleStrategy(self.name, buy=f"{rsi} < {self.buy_threshold} & close > {ema} & volume > 1.5 * {vol_avg}",
+                            sell=f"{rsi} > {self.sell_threshold}",
+                            columns={'rsi': rsi, 'ema_trend': ema, 'vol_avg': vol_avg})
+
+class RuleStrategy(BaseStrategy):
+    """
+    Strategy defined by buy/sell rule expressions (see src/expressions.py).
+    Rules compile into an ExpressionGraph of their own; pass the same `graph`
+    to several strategies to build their common indicators only once.
+    `columns` adds named indicator expressions to the analyzed frame.
+    """
+    def __init__(self, name, buy, sell, columns=None, graph=None):
+        super().__init__(name)
+        self.buy = buy
+        self.sell = sell
+        self.columns = dict(columns or {})
+        self.graph = graph if graph is not None else ExpressionGraph()
+        self.outputs = {col: self.graph.compile(expr) for col, expr in self.columns.items()}
+        for side, rule in (('buy', buy), ('sell', sell)):
+            node_id = self.graph.compile(rule)
+            if not self.graph.is_boolean(node_id):
+                raise ValueError(f"{side} rule must be a condition, e.g. close > ema(200): {rule!r}")
+            self.outputs[f'signal_{side}'] = node_id
+        self._stream = None
+        self.last_values = {} # latest streaming outputs, including `columns`
+
+    def analyze(self, df):
+        if df.empty:
+            return df
+        
+        df = df.copy()
+        values = self.graph.evaluate(df, self.outputs)
+        for col in self.columns:
+            df[col] = values[col]
+        
+        df['signal'] = None
+        df.loc[values['signal_buy'], 'signal'] = 'buy'
+        df.loc[values['signal_sell'], 'signal'] = 'sell'
+        
+        return df
+
+    @property
+    def stream(self):
+        if self._stream is None:
+            self._stream = self.graph.stream(self.outputs)
+        return self._stream
+
+    def reset(self):
+        self._stream = None
+
+    @staticmethod
+    def _to_signal(values):
+        if values['signal_sell']:
+            return 'sell'
+        if values['signal_buy']:
+            return 'buy'
+        return None
+
+    def update(self, candle):
+        """
+        Streaming mode: feed one new closed candle, get its signal ('buy', 'sell' or None).
+        Indicators are updated incrementally instead of re-analyzing the frame.
+        """
+        self.last_values = self.stream.update(candle)
+        return self._to_signal(self.last_values)
+
+    def peek(self, candle):
+        """Signal for a still-forming candle, without committing it to the streaming state."""
+        self.last_values = self.stream.peek(candle)
+        return self._to_signal(self.last_values)
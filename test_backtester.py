@@ -0,0 +1,150 @@
+import time
+import numpy as np
+import pandas as pd
+from src.backtester import Backtester
+from src.strategy import BaseStrategy, RSIStrategy, MACDStrategy, BollingerRSIStrategy
+
+def make_ohlcv(n=3000, seed=1):
+    # Synthetic 1h candles: random walk with intrabar ranges and opening gaps
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]] * np.exp(rng.normal(0, 0.003, n))
+    spread = close * rng.uniform(0.001, 0.015, n)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='1h'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.lognormal(0, 0.5, n),
+    })
+
+class FixedSignals(BaseStrategy):
+    # Uses the 'signal' column already in the frame
+    def __init__(self):
+        super().__init__("Fixed Signals")
+
+    def analyze(self, df):
+        return df
+
+def reference_equity(df_analyzed, initial_capital, fee_rate):
+    # The original row-by-row loop: all-in buys and sells at the close
+    capital, position = initial_capital, 0
+    equity, trades = [], []
+    for row in df_analyzed.itertuples():
+        if row.signal == 'buy' and position == 0:
+            position = capital * (1 - fee_rate) / row.close
+            capital = 0
+            trades.append(('buy', row.timestamp))
+        elif row.signal == 'sell' and position > 0:
+            capital = position * row.close * (1 - fee_rate)
+            position = 0
+            trades.append(('sell', row.timestamp))
+        equity.append(capital if position == 0 else position * row.close)
+    return np.array(equity), trades
+
+def reference_execution(df, capital, fee_rate, stop_loss, take_profit, slippage, position_size):
+    # Per-row model of stops, take-profits, slippage and sizing
+    holding = False
+    equity, trades = [], []
+    for row in df.itertuples():
+        if holding:
+            exit = None
+            if (stop_loss and row.low <= stop) or (take_profit and row.high >= take):
+                if stop_loss and row.open <= stop:
+                    exit = (row.open, 'stop_loss')
+                elif take_profit and row.open >= take:
+                    exit = (row.open, 'take_profit')
+                elif stop_loss and row.low <= stop:
+                    exit = (stop, 'stop_loss')
+                else:
+                    exit = (take, 'take_profit')
+            elif row.signal == 'sell':
+                exit = (row.close, 'signal')
+            if exit:
+                fill = exit[0] * (1 - slippage)
+                capital = cash + qty * fill * (1 - fee_rate)
+                holding = False
+                trades.append(('sell', row.timestamp, fill, exit[1]))
+                equity.append(capital)
+            else:
+                equity.append(cash + qty * row.close)
+        elif row.signal == 'buy':
+            fill = row.close * (1 + slippage)
+            invested = capital * position_size
+            qty = invested * (1 - fee_rate) / fill
+            cash = capital - invested
+            stop = fill * (1 - stop_loss) if stop_loss else None
+            take = fill * (1 + take_profit) if take_profit else None
+            holding = True
+            trades.append(('buy', row.timestamp, fill, None))
+            equity.append(cash + qty * row.close)
+        else:
+            equity.append(capital)
+    return np.array(equity), trades
+
+def test_default_parity():
+    df = make_ohlcv()
+    for strategy in [RSIStrategy(), MACDStrategy(), BollingerRSIStrategy()]:
+        backtester = Backtester(strategy, initial_capital=1000.0)
+        curve = backtester.run(df)
+        expected, trades = reference_equity(strategy.analyze(df), 1000.0, backtester.fee_rate)
+
+        assert len(trades) > 0, strategy.name
+        np.testing.assert_allclose(curve['equity'], expected, rtol=1e-12, err_msg=strategy.name)
+        assert [(t['type'], t['time']) for t in backtester.trades] == trades, strategy.name
+
+def test_execution_model():
+    df = RSIStrategy().analyze(make_ohlcv(seed=2))
+    for stop_loss in [None, 0.01, 0.03]:
+        for take_profit in [None, 0.02]:
+            for slippage, position_size in [(0.0, 1.0), (0.001, 0.5)]:
+                config = dict(stop_loss=stop_loss, take_profit=take_profit, slippage=slippage, position_size=position_size)
+                backtester = Backtester(FixedSignals(), initial_capital=1000.0, **config)
+                curve = backtester.run(df)
+                expected, trades = reference_execution(df, 1000.0, backtester.fee_rate, **config)
+
+                np.testing.assert_allclose(curve['equity'], expected, rtol=1e-12, err_msg=str(config))
+                actual = [(t['type'], t['time'], t['price'], t.get('reason')) for t in backtester.trades]
+                assert actual == trades, config
+
+def test_intrabar_fills():
+    # Bar 0 buys at 100; stop at 95, take-profit at 110
+    def run(bar):
+        df = pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=2, freq='1h'),
+            'open': [100.0, bar[0]], 'high': [100.0, bar[1]], 'low': [100.0, bar[2]], 'close': [100.0, bar[3]],
+            'volume': [1.0, 1.0], 'signal': ['buy', None],
+        })
+        backtester = Backtester(FixedSignals(), fee_rate=0.0, stop_loss=0.05, take_profit=0.10)
+        backtester.run(df)
+        sell = backtester.trades[-1]
+        return round(sell['price'], 9), sell['reason']
+
+    assert run((90, 91, 85, 88)) == (90, 'stop_loss')       # gapped through the stop: filled at the open
+    assert run((115, 120, 112, 118)) == (115, 'take_profit') # gapped through the take-profit
+    assert run((100, 112, 94, 105)) == (95, 'stop_loss')     # touched both: the stop is assumed first
+    assert run((100, 111, 99, 105)) == (110, 'take_profit')
+
+def test_scaling():
+    # Stops with no sell signal must not rescan to the end of the data for every trade
+    def timed(n):
+        df = make_ohlcv(n, seed=3)
+        df['signal'] = np.where(np.random.default_rng(3).random(n) < 0.05, 'buy', None)
+        backtester = Backtester(FixedSignals(), stop_loss=0.01, take_profit=0.01)
+        best = np.inf
+        for _ in range(3):
+            start = time.perf_counter()
+            backtester._simulate(df)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    small, large = timed(20_000), timed(160_000)
+    print(f"20k bars: {small:.3f}s, 160k bars: {large:.3f}s")
+    assert large < small * 16 # linear is ~8x, the quadratic scan was ~64x
+
+if __name__ == "__main__":
+    test_default_parity()
+    test_execution_model()
+    test_intrabar_fills()
+    test_scaling()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import numpy as np
+from src.checkpoint import Checkpointer, write_snapshot, read_snapshot
+from src.strategy import MACDStrategy, EnhancedTrendRSIStrategy
+from test_rules import make_ohlcv
+
+def test_snapshot_roundtrip():
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    header = {'symbol': 'BTC/USDT', 'timeframe': '1h', 'state_len': 3}
+    state = np.array([1.5, np.nan, -2.0])
+    write_snapshot(path, header, state)
+    read_header, read_state = read_snapshot(path)
+    assert read_header == header
+    np.testing.assert_array_equal(read_state, state)
+
+    # A truncated file is rejected, not misread
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-4])
+    try:
+        read_snapshot(path)
+    except ValueError as e:
+        print(f"Rejected truncated snapshot: {e}")
+    else:
+        raise AssertionError("truncated snapshot should not load")
+
+def test_state_roundtrip():
+    df = make_ohlcv(800, seed=4)
+    for strategy in [MACDStrategy(), EnhancedTrendRSIStrategy()]:
+        warm, restored = strategy.to_rules(), strategy.to_rules()
+        for row in df.iloc[:500].itertuples():
+            warm.update(row)
+        restored.stream.set_state(warm.stream.get_state())
+        assert restored.stream.signature() == warm.stream.signature()
+        for row in df.iloc[500:].itertuples():
+            assert warm.update(row) == restored.update(row)
+        for col in warm.columns:
+            assert warm.last_values[col] == restored.last_values[col], col
+
+def test_checkpointer_resume():
+    df = make_ohlcv(800, seed=5)
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    full = EnhancedTrendRSIStrategy().to_rules()
+    for row in df.itertuples():
+        full.update(row)
+
+    first = Checkpointer(path, EnhancedTrendRSIStrategy().to_rules(), 'BTC/USDT', '1h')
+    first.catch_up(df.iloc[:600])
+    assert first.save()
+
+    # A restart restores the snapshot and only feeds the candles it missed
+    resumed = Checkpointer(path, EnhancedTrendRSIStrategy().to_rules(), 'BTC/USDT', '1h')
+    assert resumed.restore()
+    assert resumed.catch_up(df.iloc[590:]) == 200
+    np.testing.assert_array_equal(resumed.strategy.stream.get_state(), full.stream.get_state())
+
+    # Stale state asks for a full warm-up instead of re-warming from a short window
+    stale = Checkpointer(path, EnhancedTrendRSIStrategy().to_rules(), 'BTC/USDT', '1h')
+    assert stale.restore()
+    changed = df.copy()
+    changed.loc[599, 'close'] += 1
+    assert stale.catch_up(changed.iloc[590:]) is None
+    assert stale.fetch_limit(1000) == 1000
+    assert not stale.save()
+
+def test_checkpointer_bad_header():
+    # Incompatible snapshots are ignored (cold start), never a crash
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    strategy = EnhancedTrendRSIStrategy().to_rules()
+    header = {'symbol': 'BTC/USDT', 'timeframe': '1h', 'signature': strategy.stream.signature(), 'state_len': 0}
+    for bad in [header, {**header, 'last_timestamp': 'yesterday', 'last_close': 1.0}, [header]]:
+        write_snapshot(path, bad, [])
+        assert not Checkpointer(path, strategy, 'BTC/USDT', '1h').restore()
+
+if __name__ == "__main__":
+    test_snapshot_roundtrip()
+    test_state_roundtrip()
+    test_checkpointer_resume()
+    test_checkpointer_bad_header()
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from src.metrics import compute_metrics, periods_per_year, trade_returns, pad_trade_returns
+from optimize import rank_results
+
+def make_curves(n_curves=5, n_bars=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, (n_curves, n_bars)), axis=1)
+
+def reference(equity, ppy):
+    # Straightforward pandas / per-bar loop versions of each metric
+    series = pd.Series(equity)
+    returns = series.pct_change().dropna()
+    drawdown = series / series.cummax() - 1
+    longest, peak_bar = 0, 0
+    for i, value in enumerate(equity):
+        if value >= equity[:i + 1].max():
+            peak_bar = i
+        longest = max(longest, i - peak_bar)
+    years = len(returns) / ppy
+    cagr = (equity[-1] / equity[0]) ** (1 / years) - 1
+    return {
+        'total_return': (equity[-1] / equity[0] - 1) * 100,
+        'cagr': cagr * 100,
+        'sharpe': returns.mean() / returns.std() * np.sqrt(ppy),
+        'sortino': returns.mean() / np.sqrt((returns.clip(upper=0) ** 2).mean()) * np.sqrt(ppy),
+        'max_drawdown': drawdown.min() * 100,
+        'max_dd_duration': longest,
+        'calmar': cagr / -drawdown.min(),
+    }
+
+def test_against_reference():
+    ppy = periods_per_year('1h')
+    assert ppy == 8760
+    for equity in make_curves():
+        metrics = compute_metrics(equity, ppy)
+        for name, expected in reference(equity, ppy).items():
+            np.testing.assert_allclose(metrics[name], expected, rtol=1e-9, err_msg=name)
+
+def test_batched_matches_single():
+    curves = make_curves()
+    rng = np.random.default_rng(1)
+    exposure = rng.random(curves.shape) < 0.4
+    per_trade = [rng.normal(0.01, 0.05, k) for k in (0, 3, 7, 1, 12)]
+    batched = compute_metrics(curves, 8760, initial=100, exposure=exposure, trade_returns=pad_trade_returns(per_trade))
+    for i, equity in enumerate(curves):
+        single = compute_metrics(equity, 8760, initial=100, exposure=exposure[i], trade_returns=per_trade[i])
+        for name, value in single.items():
+            np.testing.assert_allclose(batched[name][i], value, rtol=1e-12, equal_nan=True, err_msg=name)
+
+def test_trade_returns():
+    # Same as chaining the equity of the closed trades one by one
+    exits = np.array([105.0, 99.0, 120.0])
+    np.testing.assert_allclose(trade_returns(exits, 100.0), [0.05, 99 / 105 - 1, 120 / 99 - 1])
+    assert len(trade_returns(np.array([]), 100.0)) == 0
+
+def test_rank_ignores_infinite_scores():
+    # One lucky trade (no losses, infinite profit factor) must not rank first
+    results = pd.DataFrame({'period': [10, 14, 20], 'profit_factor': [np.inf, 2.5, 1.2]})
+    assert rank_results(results, 'profit_factor')['period'].tolist() == [14, 20, 10]
+
+if __name__ == "__main__":
+    test_against_reference()
+    test_batched_matches_single()
+    test_trade_returns()
+    test_rank_ignores_infinite_scores()
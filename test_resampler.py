@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from src.resampler import TimeframeAggregator, resample_ohlcv
+
+def make_minutes(n=3000, seed=2):
+    # 1m candles starting mid-hour, with the 03:00 and 05:00 candles missing (exchange gaps)
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01 00:07', periods=n, freq='1min'),
+        'open': close + rng.normal(0, 0.1, n),
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': rng.random(n),
+    })
+    gaps = pd.to_datetime(['2024-01-01 03:00', '2024-01-01 05:00'])
+    return df[~df['timestamp'].isin(gaps)].reset_index(drop=True)
+
+def feed(aggregator, df, seed=3):
+    # Deliver candles in small batches, each resending the last (forming) candle
+    rng = np.random.default_rng(seed)
+    aggregator.update(df.iloc[:200])
+    aggregator.get('1h')
+    aggregator.get('15m')
+    i = 200
+    while i < len(df):
+        j = i + int(rng.integers(1, 40))
+        aggregator.update(df.iloc[i - 1:j])
+        i = j
+        for timeframe in ['1h', '15m']:
+            pd.testing.assert_frame_equal(aggregator.get(timeframe), resample_ohlcv(aggregator.base, timeframe), check_dtype=False)
+
+def test_incremental_matches_full():
+    df = make_minutes()
+    aggregator = TimeframeAggregator('1m')
+    feed(aggregator, df)
+    pd.testing.assert_frame_equal(aggregator.base, df, check_dtype=False)
+
+    hourly = aggregator.get('1h')
+    pd.testing.assert_frame_equal(hourly, resample_ohlcv(df, '1h'), check_dtype=False)
+    # The gap buckets are kept, the partial 00:07 bucket is not
+    assert pd.Timestamp('2024-01-01 03:00') in set(hourly['timestamp'])
+    assert hourly['timestamp'].iloc[0] == pd.Timestamp('2024-01-01 01:00')
+
+def test_max_rows():
+    aggregator = TimeframeAggregator('1m', max_rows=300)
+    feed(aggregator, make_minutes())
+    # At most one extra hourly bucket is kept whole for the next update
+    assert len(aggregator.base) <= 300 + 60
+    print(f"Base rows kept: {len(aggregator.base)}, hourly candles: {len(aggregator.get('1h'))}")
+
+if __name__ == "__main__":
+    test_incremental_matches_full()
+    test_max_rows()
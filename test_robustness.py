@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from src.robustness import RobustnessAnalyzer, _block_stats, _path_metrics
+
+def brute_force(returns):
+    # Total return (%), max drawdown (%) and per-bar Sharpe from the full path
+    equity = np.concatenate([[1.0], np.cumprod(1 + returns)])
+    peak = np.maximum.accumulate(equity)
+    return (equity[-1] - 1) * 100, ((equity - peak) / peak).min() * 100, returns.mean() / returns.std(ddof=1)
+
+def test_block_composition():
+    # Path stats composed from per-block summaries equal those of the rebuilt path
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0005, 0.01, 500)
+    block = 8
+    log_returns = np.log1p(returns)
+    stats = _block_stats(log_returns, block)
+    starts = rng.integers(0, len(returns) - block + 1, size=(200, 30))
+    level, worst = _path_metrics(*(s[starts] for s in stats))
+
+    for i in range(len(starts)):
+        path = np.concatenate([returns[s:s + block] for s in starts[i]])
+        total, drawdown, _ = brute_force(path)
+        np.testing.assert_allclose(np.expm1(level[i]) * 100, total, rtol=1e-9)
+        np.testing.assert_allclose(np.expm1(worst[i]) * 100, drawdown, rtol=1e-9, atol=1e-12)
+
+def test_bootstrap_returns():
+    rng = np.random.default_rng(1)
+    equity = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, 1001))
+    returns = equity[1:] / equity[:-1] - 1
+
+    # One block spanning the whole curve reproduces it exactly in every sample
+    samples = RobustnessAnalyzer(n_samples=50, block_size=len(returns), seed=0).bootstrap_returns(equity)
+    total, drawdown, sharpe = brute_force(returns)
+    np.testing.assert_allclose(samples['total_return'], total, rtol=1e-9)
+    np.testing.assert_allclose(samples['max_drawdown'], drawdown, rtol=1e-9)
+    np.testing.assert_allclose(samples['sharpe'], sharpe, rtol=1e-9)
+
+    # Same seed, same samples, whatever the worker count
+    runs = [RobustnessAnalyzer(n_samples=3000, seed=42, workers=w).bootstrap_returns(equity) for w in (1, 2, 4)]
+    for run in runs[1:]:
+        for name in run:
+            np.testing.assert_array_equal(run[name], runs[0][name])
+
+def test_resample_trades():
+    trades = np.random.default_rng(2).normal(0.01, 0.05, 40)
+    total, _, _ = brute_force(trades)
+    # Shuffling keeps the final return and can only move the drawdown around
+    samples = RobustnessAnalyzer(n_samples=500, seed=0).resample_trades(trades, method='shuffle')
+    np.testing.assert_allclose(samples['total_return'], total, rtol=1e-9)
+    assert np.all(samples['max_drawdown'] <= 0)
+
+def test_periods_per_year():
+    # An explicit periods_per_year wins over the backtester's
+    class Stub:
+        periods_per_year = 8760.0
+        initial_capital = 100.0
+        exit_equity = np.array([])
+        strategy = type('Strategy', (), {'name': 'Stub'})
+        equity_curve = pd.DataFrame({'equity': 100 * np.cumprod(1 + np.random.default_rng(3).normal(0, 0.01, 500))})
+
+    analyzer = RobustnessAnalyzer(n_samples=100, seed=0, periods_per_year=365.0)
+    daily = analyzer.run(Stub())['returns'].loc['sharpe', 'observed']
+    hourly = RobustnessAnalyzer(n_samples=100, seed=0).run(Stub())['returns'].loc['sharpe', 'observed']
+    assert analyzer.periods_per_year == 365.0
+    np.testing.assert_allclose(hourly / daily, np.sqrt(8760 / 365), rtol=1e-9)
+
+if __name__ == "__main__":
+    test_block_composition()
+    test_bootstrap_returns()
+    test_resample_trades()
+    test_periods_per_year()
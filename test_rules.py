@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from src.expressions import ExpressionGraph, parse
+from src.strategy import RuleStrategy, RSIStrategy, MACDStrategy, BollingerRSIStrategy, EnhancedTrendRSIStrategy
+
+def make_ohlcv(n=1500, seed=0):
+    # Synthetic 1h candles: drifting random walk with occasional volume spikes
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = close * rng.uniform(0.001, 0.01, n)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='1h'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.lognormal(0, 0.5, n),
+    })
+
+def test_rules_match_strategies():
+    df = make_ohlcv()
+    for strategy in [RSIStrategy(), MACDStrategy(), BollingerRSIStrategy(), EnhancedTrendRSIStrategy()]:
+        rules = strategy.to_rules()
+        expected = strategy.analyze(df)
+        batch = rules.analyze(df)
+        print(f"{strategy.name}: {expected['signal'].notna().sum()} signals")
+
+        # Batch mode: identical signals and indicator columns
+        assert expected['signal'].tolist() == batch['signal'].tolist(), strategy.name
+        for col in rules.columns:
+            np.testing.assert_allclose(batch[col], expected[col], rtol=1e-9, equal_nan=True, err_msg=col)
+
+        # Streaming mode: one candle at a time gives the same signals and values
+        streamed = [rules.update(row) for row in df.itertuples()]
+        assert streamed == expected['signal'].tolist(), strategy.name
+        for col in rules.columns:
+            np.testing.assert_allclose(rules.last_values[col], expected[col].iloc[-1], rtol=1e-9, equal_nan=True, err_msg=col)
+
+def test_parser():
+    # Precedence: comparisons bind tighter than &, which binds tighter than |
+    assert parse("close > 1 | close < 2 & volume > 3") == parse("(close > 1) | ((close < 2) & (volume > 3))")
+    assert parse("1 + 2 * close") == parse("1 + (2 * close)")
+
+    # Shared sub-expressions become a single node
+    graph = ExpressionGraph()
+    graph.compile("rsi(14) < 30 & close > ema(200)")
+    size = len(graph.nodes)
+    graph.compile("rsi(14) > 70 | close < ema(200)")
+    assert len(graph.nodes) == size + 4 # const 70, >, <, |
+
+    bad_rules = [
+        "rsi(14) <", "close >> 1", "foo(3) > 1", "(close > 1",
+        # Windows and lags must be positive whole numbers
+        "prev(close, -1) > close", "ema(14.7) > close", "ema(0) > 1", "sma(volume, 0) > 1", "macd(12, 0) > 0",
+        # & | ~ only combine conditions
+        "rsi(14) < 30 & close", "~close",
+    ]
+    for bad in bad_rules:
+        try:
+            graph.compile(bad)
+        except ValueError as e:
+            print(f"Rejected {bad!r}: {e}")
+        else:
+            raise AssertionError(f"{bad!r} should not compile")
+
+def test_rule_strategy_graphs():
+    # Buy/sell rules must be conditions
+    for rule in ["close", "ema(20) - close"]:
+        try:
+            RuleStrategy("Bad", buy=rule, sell="rsi(14) > 70")
+        except ValueError as e:
+            print(f"Rejected buy rule {rule!r}: {e}")
+        else:
+            raise AssertionError(f"{rule!r} should not be accepted as a buy rule")
+
+    # Each strategy gets its own graph, so compiling many doesn't grow a global one
+    strategies = [RSIStrategy(period).to_rules() for period in range(5, 200)]
+    assert all(len(s.graph.nodes) == len(strategies[0].graph.nodes) for s in strategies)
+    assert strategies[0].stream.signature() == RSIStrategy(5).to_rules().stream.signature()
+
+    # Sharing is opt-in through graph=
+    graph = ExpressionGraph()
+    RuleStrategy("A", buy="rsi(14) < 30", sell="rsi(14) > 70", graph=graph)
+    size = len(graph.nodes)
+    RuleStrategy("B", buy="rsi(14) < 25", sell="rsi(14) > 70", graph=graph)
+    assert len(graph.nodes) == size + 2 # const 25, <
+
+if __name__ == "__main__":
+    test_rules_match_strategies()
+    test_parser()
+    test_rule_strategy_graphs()